@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+"""Generate synthetic C++ sources for the benchmarks.
+
+Files are generated deterministically from a seed, so runs on different
+machines or revisions check exactly the same codes.
+"""
+
+import os
+import os.path
+import random
+
+# Named size -> number of classes generated in one file
+SCALES = {
+    "small": 4,
+    "medium": 32,
+    "large": 160,
+}
+
+def _make_name(rng, words=2, is_bad=False):
+    parts = [rng.choice(_WORDS) for i in range(words)]
+    if is_bad:
+        # Violates the lower case rules of the default config
+        return parts[0] + "".join([apart.capitalize() for apart in parts[1:]])
+
+    return "_".join(parts)
+
+_WORDS = [
+    "alpha", "beta", "gamma", "delta", "index", "count", "value", "buffer",
+    "node", "item", "frame", "packet", "entry", "table", "state", "queue",
+    "reg", "field", "mask", "offset", "size", "data", "port", "clock",
+]
+
+def _generate_body(rng, lines):
+    codes = []
+    for i in range(lines):
+        kind = rng.randint(0, 3)
+        if kind == 0:
+            codes.append("    int %s_%d = %d;" % (_make_name(rng), i, i))
+        elif kind == 1:
+            codes.append("    for (int i = 0; i < %d; ++i) { total += i; }" % i)
+        elif kind == 2:
+            codes.append("    // Comment with braces { } and \"quotes\"")
+        else:
+            codes.append("    if (total > %d) { total -= %d; }" % (i, i))
+    return codes
+
+def generate_source(rng, class_count, body_lines=20):
+    """Return source codes of a header with class_count classes"""
+    codes = ["#ifndef GENERATED_H", "#define GENERATED_H", ""]
+
+    for i in range(class_count * 4):
+        codes.append("#define %s_%d %d" % (
+            _make_name(rng, 3).upper(), i, i))
+    for i in range(class_count):
+        codes.append("#define %s_%d(a, b) ((a) + (b))" % (
+            _make_name(rng).upper(), i))
+
+    codes.append("")
+    codes.append("namespace %s {" % _make_name(rng))
+    codes.append("")
+
+    for i in range(class_count):
+        codes.append("enum %s_%d_t {" % (_make_name(rng), i))
+        for j in range(8):
+            codes.append("    %s_%d_%d," % (_make_name(rng).upper(), i, j))
+        codes.append("};")
+        codes.append("")
+
+        codes.append("typedef unsigned int %s_%d_t;" % (_make_name(rng), i))
+        codes.append("")
+
+        codes.append("template <typename T>")
+        codes.append("class %s_%d_t {" % (_make_name(rng), i))
+        codes.append("public:")
+        codes.append("    T get_value(T default_value) const")
+        codes.append("    {")
+        codes.append("        T result_value = default_value;")
+        codes.append("        return result_value;")
+        codes.append("    }")
+        codes.append("private:")
+        codes.append("    T m_value;")
+        codes.append("};")
+        codes.append("")
+
+        class_name = "%s_%d_t" % (_make_name(rng), i)
+        codes.append("class %s {" % class_name)
+        codes.append("public:")
+        codes.append("    %s();" % class_name)
+        for j in range(6):
+            method_name = "%s_%d" % (_make_name(rng, is_bad=(j == 5)), j)
+            codes.append("    int %s(int %s, int %s)" % (
+                method_name, _make_name(rng), _make_name(rng)))
+            codes.append("    {")
+            codes.append("        int total = 0;")
+            codes.extend(["    " + aline for aline in _generate_body(rng, body_lines)])
+            codes.append("        return total;")
+            codes.append("    }")
+        codes.append("private:")
+        for j in range(6):
+            codes.append("    int m_%s_%d;" % (_make_name(rng), j))
+        codes.append("    static int s_%s;" % _make_name(rng))
+        codes.append("};")
+        codes.append("")
+
+        function_name = "%s_%d" % (_make_name(rng), i)
+        codes.append("int %s(int %s)" % (function_name, _make_name(rng)))
+        codes.append("{")
+        codes.append("    int total = 0;")
+        codes.extend(_generate_body(rng, body_lines * 2))
+        codes.append("    return total;")
+        codes.append("}")
+        codes.append("")
+
+        codes.append("int g_%s_%d = 0;" % (_make_name(rng), i))
+        codes.append("")
+
+    codes.append("}")
+    codes.append("")
+    codes.append("#endif")
+    codes.append("")
+    return "\n".join(codes)
+
+def generate_corpus(output_dir, scale, file_count, seed=0):
+    """Write file_count generated headers of scale into output_dir, return
+    their paths.
+    """
+    rng = random.Random("%s:%s:%s" % (seed, scale, file_count))
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    file_paths = []
+    for i in range(file_count):
+        file_path = os.path.join(output_dir, "%s_%d.h" % (scale, i))
+        with open(file_path, "w") as source_file:
+            source_file.write(generate_source(rng, SCALES[scale]))
+        file_paths.append(file_path)
+
+    return file_paths
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+"""Compare the lite front-end with the CppHeaderParser one.
+
+Checks the generated corpus (and any files given) with both front-ends, then
+prints the identifiers checked per rule and the violations only one of them
+reported:
+
+    python benchmarks/parity.py -s small,medium src/foo.h
+
+Exit code is 1 if any violation differs.
+"""
+
+import os
+import os.path
+import sys
+import shutil
+import argparse
+import tempfile
+
+_BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _BENCHMARKS_DIR)
+sys.path.insert(0, os.path.join(_BENCHMARKS_DIR, "..", "src"))
+
+import corpus
+from ncstyler.rules import RuleTable
+from ncstyler.checker import Checker, FRONTENDS, FRONTEND_CPPHEADERPARSER
+from ncstyler.stats import FileStats
+
+def check_with(checker, file_path):
+    """Return identifiers checked per rule and (rule, name) of violations,
+    or None if the file could not be parsed.
+    """
+    stats = FileStats(file_path)
+    diagnostics = checker.check_file(file_path, stats)[1]
+    if len([d for d in diagnostics if d.severity == "warning"]) > 0:
+        return None
+
+    violations = set([(d.rule, d.name) for d in diagnostics
+                      if d.rule is not None])
+    return stats.rule_counts, violations
+
+def compare_file(checkers, file_path):
+    results = dict((frontend, check_with(checker, file_path))
+                   for frontend, checker in checkers.items())
+
+    if results[FRONTEND_CPPHEADERPARSER] is None:
+        # Nothing to compare with
+        print("%s: skipped, %s could not parse it" % (
+            file_path, FRONTEND_CPPHEADERPARSER))
+        return True
+
+    reference_counts, reference_violations = results[FRONTEND_CPPHEADERPARSER]
+    is_same = True
+    for frontend in FRONTENDS:
+        if frontend == FRONTEND_CPPHEADERPARSER:
+            continue
+
+        rule_counts, violations = results[frontend]
+        for rule in sorted(set(reference_counts) | set(rule_counts)):
+            if reference_counts.get(rule, 0) != rule_counts.get(rule, 0):
+                print("%s: %s checked %d %s identifiers, %s checked %d" % (
+                    file_path, FRONTEND_CPPHEADERPARSER,
+                    reference_counts.get(rule, 0), rule, frontend,
+                    rule_counts.get(rule, 0)))
+
+        for rule, name in sorted(reference_violations - violations):
+            is_same = False
+            print("%s: only %s reported %s '%s'" % (
+                file_path, FRONTEND_CPPHEADERPARSER, rule, name))
+        for rule, name in sorted(violations - reference_violations):
+            is_same = False
+            print("%s: only %s reported %s '%s'" % (
+                file_path, frontend, rule, name))
+
+    return is_same
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-c", "--config",
+        default=os.path.join(_BENCHMARKS_DIR, "..", "docs", "cfg", "default.yaml"),
+        help="Configuration file path (default: %(default)s)")
+    parser.add_argument("-s", "--scales", default="small",
+        help="Comma separated scales of %s, empty for none" % ", ".join(
+            sorted(corpus.SCALES)))
+    parser.add_argument("-n", "--files", type=int, default=5,
+        help="Number of files generated for each scale")
+    parser.add_argument("file_paths", nargs="*", metavar="file_path",
+        help="Extra source files to compare")
+    args = parser.parse_args()
+
+    rules = RuleTable.from_file(args.config)
+    checkers = dict((frontend, Checker(rules, frontend=frontend))
+                    for frontend in FRONTENDS)
+
+    work_dir = tempfile.mkdtemp(prefix="ncstyler_parity_")
+    try:
+        file_paths = list(args.file_paths)
+        for scale in args.scales.split(","):
+            scale = scale.strip()
+            if len(scale) > 0:
+                file_paths += corpus.generate_corpus(
+                    os.path.join(work_dir, scale), scale, args.files)
+
+        different_count = 0
+        for file_path in file_paths:
+            if not compare_file(checkers, file_path):
+                different_count += 1
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("%d of %d files reported different violations" % (
+        different_count, len(file_paths)))
+    return 1 if different_count > 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
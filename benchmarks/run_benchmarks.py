@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+
+"""Measure throughput of ncstyler on generated C++ corpora.
+
+Times each phase reported by ncstyler.stats separately: the CppHeaderParser
+parsing, the _validate_cpp_object() traversal, the function body scanning
+(_validate_codes_of_cpp_method()) and so on, then saves the results as JSON, which could be compared with a previous run:
+
+    python benchmarks/run_benchmarks.py -o new.json --compare old.json
+"""
+
+import os
+import os.path
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+_BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _BENCHMARKS_DIR)
+sys.path.insert(0, os.path.join(_BENCHMARKS_DIR, "..", "src"))
+
+import ncstyler
+import corpus
+from ncstyler.checker import Checker, FRONTENDS, FRONTEND_CPPHEADERPARSER
+from ncstyler.stats import FileStats, PHASES
+
+def _run_once(checker, sources):
+    result = dict(("%s_seconds" % phase, 0.0) for phase in PHASES)
+    result["identifiers"] = 0
+
+    for file_path, source in sources:
+        stats = FileStats(file_path)
+        checker.check_source(file_path, source, stats)
+
+        for phase, seconds in stats.phase_seconds.items():
+            result["%s_seconds" % phase] += seconds
+        result["identifiers"] += sum(stats.rule_counts.values())
+
+    result["total_seconds"] = sum(
+        [result["%s_seconds" % phase] for phase in PHASES])
+    return result
+
+def _measure_peak_memory(checker, sources):
+    tracemalloc.start()
+    try:
+        for file_path, source in sources:
+            checker.check_source(file_path, source)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run_scale(checker, work_dir, scale, file_count, repeat):
+    file_paths = corpus.generate_corpus(
+        os.path.join(work_dir, scale), scale, file_count)
+
+    sources = []
+    total_bytes = 0
+    for file_path in file_paths:
+        with open(file_path, "r") as source_file:
+            source = source_file.read()
+        sources.append((file_path, source))
+        total_bytes += len(source)
+
+    # Best of the repeats, the others are disturbed by the system
+    best = None
+    for i in range(repeat):
+        result = _run_once(checker, sources)
+        if (best is None) or (result["total_seconds"] < best["total_seconds"]):
+            best = result
+
+    best.update({
+        "files": file_count,
+        "bytes": total_bytes,
+        "files_per_second": file_count / best["total_seconds"],
+        "identifiers_per_second":
+            best["identifiers"] / best["total_seconds"],
+        "peak_memory_bytes": _measure_peak_memory(checker, sources),
+    })
+    return best
+
+def _print_result(scale, result, baseline=None):
+    print("%s: %d files, %d KiB, %d identifiers" % (
+        scale, result["files"], result["bytes"] // 1024,
+        result["identifiers"]))
+    keys = ["%s_seconds" % phase for phase in PHASES] + [
+        "total_seconds", "files_per_second", "identifiers_per_second",
+        "peak_memory_bytes"]
+    for key in keys:
+        aline = "    %-24s %14.4f" % (key, result[key])
+        if (baseline is not None) and (baseline.get(key, 0) > 0):
+            aline += "  (%.2fx of baseline)" % (result[key] / baseline[key])
+        print(aline)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-c", "--config",
+        default=os.path.join(_BENCHMARKS_DIR, "..", "docs", "cfg", "default.yaml"),
+        help="Configuration file path (default: %(default)s)")
+    parser.add_argument("-s", "--scales", default=",".join(sorted(corpus.SCALES)),
+        help="Comma separated scales of %s" % ", ".join(sorted(corpus.SCALES)))
+    parser.add_argument("-n", "--files", type=int, default=5,
+        help="Number of files generated for each scale")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+        help="Run each scale this many times and keep the best one")
+    parser.add_argument("--frontend", choices=FRONTENDS,
+        default=FRONTEND_CPPHEADERPARSER,
+        help="Front-end extracting the identifiers (default: %(default)s)")
+    parser.add_argument("-o", "--output", help="Save results to JSON file")
+    parser.add_argument("--compare", help="Compare with a saved JSON file")
+    parser.add_argument("--work-dir",
+        help="Directory for the generated files, default a temporary one")
+    args = parser.parse_args()
+
+    checker = Checker.from_config_file(args.config, frontend=args.frontend)
+
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare, "r") as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+    work_dir = args.work_dir
+    if work_dir is None:
+        work_dir = tempfile.mkdtemp(prefix="ncstyler_bench_")
+
+    results = dict()
+    try:
+        for scale in args.scales.split(","):
+            scale = scale.strip()
+            results[scale] = run_scale(
+                checker, work_dir, scale, args.files, args.repeat)
+            _print_result(scale, results[scale],
+                          None if baseline is None else baseline.get(scale))
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump({
+                "version": ncstyler.__version__,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "frontend": args.frontend,
+                "timestamp": time.time(),
+                "results": results,
+            }, output_file, indent=2, sort_keys=True)
+
+if __name__ == "__main__":
+    main()
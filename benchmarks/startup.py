@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+"""Measure startup time of the ncstyler command line.
+
+Runs the per-file invocations hooks make in fresh interpreters: --help, a
+check with the config and result caches cold, and the same check with them
+warm. Saves the results as JSON, which could be compared with a previous run
+(for example of an older revision):
+
+    python benchmarks/startup.py -o new.json --compare old.json
+"""
+
+import os
+import os.path
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+_BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+_SOURCE_DIR = os.path.join(_BENCHMARKS_DIR, "..", "src")
+
+_SAMPLE_SOURCE = """\
+#define MAX_ITEM_COUNT 16
+
+namespace sample {
+
+class item_list_t {
+public:
+    int get_count() const;
+    void add_item(int item_value);
+private:
+    int m_count;
+};
+
+}
+"""
+
+def _time_command(arguments, repeat):
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(
+        [_SOURCE_DIR] + [p for p in [environment.get("PYTHONPATH")] if p])
+
+    seconds = []
+    for i in range(repeat):
+        start_time = time.time()
+        with open(os.devnull, "w") as null_file:
+            subprocess.call([sys.executable, "-m", "ncstyler.console"]
+                            + arguments, stdout=null_file, stderr=null_file,
+                            env=environment)
+        seconds.append(time.time() - start_time)
+
+    seconds.sort()
+    return {"min_seconds": seconds[0],
+            "median_seconds": seconds[len(seconds) // 2]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-c", "--config",
+        default=os.path.join(_BENCHMARKS_DIR, "..", "docs", "cfg", "default.yaml"),
+        help="Configuration file path (default: %(default)s)")
+    parser.add_argument("-r", "--repeat", type=int, default=10,
+        help="Run each invocation this many times")
+    parser.add_argument("-o", "--output", help="Save results to JSON file")
+    parser.add_argument("--compare", help="Compare with a saved JSON file")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare, "r") as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+    work_dir = tempfile.mkdtemp(prefix="ncstyler_startup_")
+    try:
+        source_path = os.path.join(work_dir, "item_list.h")
+        with open(source_path, "w") as source_file:
+            source_file.write(_SAMPLE_SOURCE)
+        cache_dir = os.path.join(work_dir, "cache")
+        check_arguments = ["-c", os.path.abspath(args.config),
+                           "--cache-dir", cache_dir, source_path]
+
+        results = dict()
+        results["help"] = _time_command(["--help"], args.repeat)
+        results["check_no_cache"] = _time_command(
+            ["--no-cache"] + check_arguments, args.repeat)
+        # Fill the caches, then every run hits them
+        _time_command(check_arguments, 1)
+        results["check_cached"] = _time_command(check_arguments, args.repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    for name in sorted(results):
+        aline = "%-16s min %8.4fs  median %8.4fs" % (
+            name, results[name]["min_seconds"], results[name]["median_seconds"])
+        if (baseline is not None) and (name in baseline):
+            aline += "  (%.2fx of baseline)" % (
+                results[name]["median_seconds"]
+                / baseline[name]["median_seconds"])
+        print(aline)
+
+    if args.output is not None:
+        with open(args.output, "w") as output_file:
+            json.dump({
+                "python": sys.version.split()[0],
+                "timestamp": time.time(),
+                "results": results,
+            }, output_file, indent=2, sort_keys=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+import os
+import os.path
+import json
+
+BASELINE_VERSION = 1
+
+class BaselineError(Exception):
+    pass
+
+class Baseline(object):
+    """Known violations to suppress, counted by file, rule and name.
+
+    Line numbers are not part of the key, so editing a file does not
+    invalidate it's entries. Files are keyed by their path relative to the
+    directory of the baseline file, so the baseline works from any working
+    directory. A name violated n times in a file is suppressed at most n
+    times there, new occurrences are still reported.
+    """
+
+    def __init__(self, root, violations=None):
+        self.root = os.path.abspath(root)
+        # File key -> {rule -> {name -> count}}
+        self.violations = violations if violations is not None else dict()
+
+    @classmethod
+    def load(cls, baseline_path):
+        try:
+            with open(baseline_path, "r") as baseline_file:
+                values = json.load(baseline_file)
+            if values.get("version", None) != BASELINE_VERSION:
+                raise ValueError("unsupported version %s" % values.get(
+                    "version", None))
+            violations = values["violations"]
+        except (IOError, OSError, ValueError, KeyError, AttributeError) as e:
+            raise BaselineError(
+                "Failed to load baseline '%s' : %s" % (baseline_path, e))
+
+        return cls(os.path.dirname(os.path.abspath(baseline_path)), violations)
+
+    def save(self, baseline_path):
+        # One line per file, compact while keeping diffs of it small
+        lines = ["%s: %s" % (json.dumps(file_key), json.dumps(
+            self.violations[file_key], sort_keys=True, separators=(",", ":")))
+            for file_key in sorted(self.violations.keys())]
+        with open(baseline_path, "w") as baseline_file:
+            baseline_file.write('{"version": %s, "violations": {\n%s\n}}\n' % (
+                BASELINE_VERSION, ",\n".join(lines)))
+
+    def _get_file_key(self, file_path):
+        file_path = os.path.abspath(file_path)
+        try:
+            file_path = os.path.relpath(file_path, self.root)
+        except ValueError:
+            # On an other drive
+            pass
+        return file_path.replace(os.sep, "/")
+
+    def add(self, file_path, diagnostics):
+        """Record name violations of the diagnostics of file_path"""
+        rules = None
+        for adiagnostic in diagnostics:
+            if adiagnostic.rule is None:
+                continue
+
+            if rules is None:
+                rules = self.violations.setdefault(
+                    self._get_file_key(file_path), dict())
+            names = rules.setdefault(adiagnostic.rule, dict())
+            names[adiagnostic.name] = names.get(adiagnostic.name, 0) + 1
+
+    def count(self):
+        return sum([sum(names.values())
+            for rules in self.violations.values()
+            for names in rules.values()])
+
+    def filter(self, file_path, diagnostics):
+        """Return diagnostics of file_path not in the baseline"""
+        rules = self.violations.get(self._get_file_key(file_path), None)
+        if rules is None:
+            return diagnostics
+
+        # Counts left to suppress, the baseline itself is never changed
+        suppressed = dict()
+        result = []
+        for adiagnostic in diagnostics:
+            names = rules.get(adiagnostic.rule, None)
+            if (names is not None) and (adiagnostic.name in names):
+                key = (adiagnostic.rule, adiagnostic.name)
+                count = suppressed.get(key, names[adiagnostic.name])
+                if count > 0:
+                    suppressed[key] = count - 1
+                    continue
+
+            result.append(adiagnostic)
+
+        return result
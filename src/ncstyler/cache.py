@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+import os
+import os.path
+import json
+import hashlib
+import tempfile
+import ncstyler
+
+DEFAULT_CACHE_DIR = ".ncstyler_cache"
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# Bump whenever the results of a same file and configuration change (new
+# checks, line numbers, diagnostic fields), the version of the package is
+# not bumped by every such change
+CACHE_FORMAT = 2
+
+class ResultCache(object):
+    """On-disk cache of per-file check results.
+
+    Entries are keyed by the file content, the file name (filename rule
+    depends on it), the resolved configuration, the tool version and
+    CACHE_FORMAT, so a changed file, configuration or checker never hits a
+    stale entry.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size=DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def make_key(self, content, file_name, config_digest):
+        hasher = hashlib.sha1()
+        for part in (ncstyler.__version__, str(CACHE_FORMAT), config_digest,
+                     file_name):
+            hasher.update(part.encode("utf-8"))
+            hasher.update(b"\0")
+        hasher.update(content)
+        return hasher.hexdigest()
+
+    def _get_entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], "%s.json" % key)
+
+    def get(self, key):
+        entry_path = self._get_entry_path(key)
+        try:
+            with open(entry_path, "r") as entry_file:
+                entry = json.load(entry_file)
+            result = entry["exit_code"], entry["lines"]
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+        # Touch the entry, so prune() evicts the least recently used ones
+        try:
+            os.utime(entry_path, None)
+        except OSError:
+            pass
+
+        return result
+
+    def put(self, key, exit_code, lines):
+        entry_path = self._get_entry_path(key)
+        entry_dir = os.path.dirname(entry_path)
+        try:
+            if not os.path.isdir(entry_dir):
+                os.makedirs(entry_dir)
+
+            # Write to a temporary file then rename it, so concurrent workers
+            # never see a partial entry
+            fd, temp_path = tempfile.mkstemp(dir=entry_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as entry_file:
+                json.dump({"exit_code": exit_code, "lines": lines}, entry_file)
+            os.rename(temp_path, entry_path)
+        except (IOError, OSError):
+            # Cache is only an optimization, never fail the check for it
+            pass
+
+    def prune(self):
+        """Evict least recently used entries until cache fits max_size"""
+        entries = []
+        total_size = 0
+        for root, dir_names, file_names in os.walk(self.cache_dir):
+            for file_name in file_names:
+                entry_path = os.path.join(root, file_name)
+                try:
+                    stat = os.stat(entry_path)
+                except OSError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, entry_path))
+                total_size += stat.st_size
+
+        if total_size <= self.max_size:
+            return
+
+        entries.sort()
+        for mtime, size, entry_path in entries:
+            try:
+                os.remove(entry_path)
+            except OSError:
+                continue
+
+            total_size -= size
+            if total_size <= self.max_size:
+                break
@@ -0,0 +1,677 @@
+#!/usr/bin/env python
+
+import re
+import six
+import sys
+import os.path
+import threading
+from timeit import default_timer
+from ncstyler.rules import RuleTable
+from ncstyler.guards import FileTimeoutError, raise_swallowed
+from ncstyler.scanner import (
+    SourceScanner, open_source, decode_source, scan_defines, LOCAL_VARIANT_RE)
+from ncstyler.diagnostics import Diagnostic
+from ncstyler.identifier import Identifier
+
+# CppHeaderParser (with ply), the lite front-end and traceback are imported
+# where they are needed, so starting up for a cached result or --help does
+# not pay for them.
+
+# Front-ends extracting identifiers from the source:
+#   cppheaderparser : Parse with CppHeaderParser, the reference one
+#   lite            : Stream tokens by ncstyler.lite, much faster
+FRONTEND_CPPHEADERPARSER = "cppheaderparser"
+FRONTEND_LITE = "lite"
+FRONTENDS = (FRONTEND_CPPHEADERPARSER, FRONTEND_LITE)
+
+# Kinds a declaration of the header may get in the implementation file, out of
+# line struct methods are seen as class methods there
+_PAIRED_KINDS = {"struct_method": "class_method"}
+
+# CppHeaderParser keeps parsing states in module and class level variables
+_parser_lock = threading.Lock()
+
+class _CheckContext(object):
+    """States of the file being checked"""
+
+    __slots__ = ("file_path", "source", "identifiers", "fallbacks", "stats")
+
+    def __init__(self, file_path, source, stats=None):
+        self.file_path = file_path
+        self.source = source
+        # Identifiers collected to validate, in the order they are found
+        self.identifiers = []
+        # Index of identifier -> the fallback Identifier of it
+        self.fallbacks = dict()
+        # FileStats to fill while profiling
+        self.stats = stats
+
+class Checker(object):
+    """Validates names of source codes against a rule table.
+
+    Independent of the command line, so it could be used as a library:
+
+        checker = Checker.from_config_file("ncstyler.yaml")
+        diagnostics = checker.check("foo.h")
+        diagnostics = checker.check(text, file_path="foo.h")
+
+    A checker never changes after construction, all states of the file being
+    checked live in a _CheckContext, so one checker could be shared by many
+    threads.
+    """
+
+    def __init__(self, rules, max_errors=0, debug=False,
+                 frontend=FRONTEND_CPPHEADERPARSER):
+        if frontend not in FRONTENDS:
+            raise ValueError("Unknown frontend '%s'" % frontend)
+
+        self.rules = rules
+        # Which parser extracts the identifiers, see FRONTENDS
+        self.frontend = frontend
+        # Stop checking a file after this many errors, 0 means report all
+        self.max_errors = max_errors
+        # Print the traceback of files failed to check
+        self.debug = debug
+
+    @classmethod
+    def from_config_file(cls, config_path, **kwargs):
+        return cls(RuleTable.from_file(config_path), **kwargs)
+
+    def _is_special_method(self, amethod):
+        if isinstance(amethod, six.string_types):
+            amethod_name = amethod
+        else:
+            amethod_name = amethod["name"]
+
+        founded = re.findall(r"(?:^|[^\w]+)operator[^\w]+", amethod_name)
+        if len(founded) <= 0:
+            if re.match(r"(?:^|.*\W)operator\W.*", amethod["debug"]) is not None:
+                return True
+
+            return False
+
+        return True
+
+    def _get_argument_name(self, an_argument):
+        if isinstance(an_argument, six.string_types):
+            return an_argument
+
+        if len(an_argument["name"]) > 0:
+            return an_argument["name"]
+
+        # If it's a functor?? with "class name::function" style
+        matched = re.match(r"^\w+\s*\(\w*::\*(\w+)\)\(.*$", an_argument["type"])
+        if matched is None:
+            # with normal "function" style
+            matched = re.match(r"[^\(]*\([^\)]*\W(\w+)\W.*\).*", an_argument["type"])
+
+        if matched is None:
+            return ""
+        else:
+            return matched.group(1)
+
+    def _is_valid_variable(self, cpp_variable):
+        if cpp_variable["type"] == "return":
+            return False
+
+        if len(cpp_variable["type"]) <= 0:
+            return False
+
+        return True
+
+    def _get_cpp_method_re(self, name):
+        prefix = "operator"
+        if not name.startswith(prefix):
+            return re.escape(name)
+
+        # Operator methods
+        chars = []
+        for achar in name[len(prefix):]:
+            chars.append("\\s*")
+            if achar.isalnum():
+                chars.append(achar)
+            else:
+                chars.append("\\")
+                chars.append(achar)
+
+        return "operator%s" % ''.join(chars)
+
+    def _validate_codes_of_cpp_method(self, context, cpp_method):
+        if context.stats is None:
+            return self._validate_codes_of_cpp_method_body(context, cpp_method)
+
+        start_time = default_timer()
+        try:
+            return self._validate_codes_of_cpp_method_body(context, cpp_method)
+        finally:
+            context.stats.add_phase("body", default_timer() - start_time)
+
+    def _validate_codes_of_cpp_method_body(self, context, cpp_method):
+        body_span = context.source.find_function_body(
+            cpp_method["line_number"],
+            self._get_cpp_method_re(cpp_method["name"]))
+        if body_span is None:
+            return
+
+        line_number = cpp_method["line_number"]
+        for matched in LOCAL_VARIANT_RE.finditer(context.source.text, *body_span):
+            self._check_name(
+                context, Identifier("variant", matched.group(1), line_number))
+
+    def _make_identifier(self, cpp_object, kind, scope=None):
+        """Identifier of a CppHeaderParser object, or None if it has no name"""
+        if isinstance(cpp_object, six.string_types):
+            cpp_object_name = cpp_object
+            line_number = -1
+        elif "name" in cpp_object:
+            cpp_object_name = cpp_object["name"]
+            if ('<' in cpp_object_name) and ("debug" in cpp_object):
+                matched = re.match(r".*?(\w+)\W+$", cpp_object["debug"])
+                if matched is not None:
+                    cpp_object_name = matched.group(1)
+            line_number = cpp_object.get("line_number", -1)
+        else:
+            return None
+
+        # Parse union like names
+        splitted = cpp_object_name.split()
+        if len(splitted) > 1:
+            cpp_object_name = splitted[-1]
+
+        return Identifier(kind, cpp_object_name, line_number, scope=scope)
+
+    def _is_valid_name(self, name):
+        # Names like "..." or empty ones are not real names, we must not
+        # check them.
+        return (len(name) > 0) and ('...' not in name)
+
+    def _check_name(self, context, identifier, fallback=None):
+        """Collect the identifier to validate.
+
+        fallback is an optional Identifier, the violation is dropped if the
+        fallback one matched. Nothing collected if identifier is None.
+        """
+        if (identifier is None) or (not self._is_valid_name(identifier.name)):
+            return
+
+        if fallback is not None:
+            context.fallbacks[len(context.identifiers)] = fallback
+        context.identifiers.append(identifier)
+
+    def _validate_identifiers(self, context):
+        """Match all collected identifiers, return diagnostics of the
+        violations in the order identifiers were found.
+
+        Identifiers are grouped by rule and each group is matched in one
+        pass with the rule's compiled pattern.
+        """
+        identifiers = context.identifiers
+        stats = context.stats
+
+        groups = dict()
+        for index, identifier in enumerate(identifiers):
+            group = groups.get(identifier.kind, None)
+            if group is None:
+                group = groups[identifier.kind] = []
+            group.append(index)
+
+        violations = []
+        for kind, indexes in groups.items():
+            start_time = default_timer()
+            fullmatch = self.rules[kind].fullmatch
+            violations += [index for index in indexes
+                           if fullmatch(identifiers[index].name) is None]
+            if stats is not None:
+                stats.add_rule(kind, default_timer() - start_time,
+                               len(indexes))
+
+        if len(context.fallbacks) > 0:
+            violations = [index for index in violations
+                          if not self._is_fallback_matched(context, index)]
+
+        violations.sort()
+        if self.max_errors > 0:
+            violations = violations[:self.max_errors]
+
+        diagnostics = []
+        for index in violations:
+            identifier = identifiers[index]
+            rule = self.rules[identifier.kind]
+            diagnostics.append(Diagnostic(
+                context.file_path,
+                identifier.line_number,
+                rule=identifier.kind,
+                name=identifier.name,
+                message=rule.error_message,
+                column=identifier.column))
+
+        return diagnostics
+
+    def _is_fallback_matched(self, context, index):
+        fallback = context.fallbacks.get(index, None)
+        if fallback is None:
+            return False
+
+        if not self._is_valid_name(fallback.name):
+            # Nothing to check, treat as matched
+            return True
+
+        return self.rules[fallback.kind].fullmatch(fallback.name) is not None
+
+    def _get_class_realname(self, class_name):
+        return re.match(r"(\w+).*", class_name).group(1)
+
+    def _validate_cpp_object(self, context, cpp_object):
+        import CppHeaderParser
+
+        cpp_object_type = type(cpp_object)
+
+        if cpp_object_type == CppHeaderParser.CppClass:
+            if "struct" in cpp_object["declaration_method"]:
+                class_re = "struct"
+                class_method_re = "struct_method"
+                class_method_argument_re = "struct_method_argument"
+                class_variant_re = "struct_variant"
+            else:
+                class_re = "class"
+                class_method_re = "class_method"
+                class_method_argument_re = "class_method_argument"
+                class_variant_re = "class_variant"
+            self._check_name(
+                context, self._make_identifier(cpp_object, class_re))
+
+            scope = cpp_object["name"]
+            for amethod in cpp_object.get_all_methods():
+                matched = re.match(r".*typedef\W[^\(]*\([^\)]*\W(\w+)\W.*\).*", amethod["debug"])
+                if matched is None:
+                    self._validate_codes_of_cpp_method(context, amethod)
+                    if not self._is_special_method(amethod):
+                        if ((amethod["name"] != self._get_class_realname(cpp_object["name"]))
+                            and (not amethod.get("constructor", False))
+                            and (not amethod.get("destructor", False))):
+                            self._check_name(
+                                context,
+                                self._make_identifier(amethod, class_method_re, scope),
+                                self._make_identifier(amethod, "define_function", scope))
+
+                    for aparameter in amethod["parameters"]:
+                        line_number = aparameter["line_number"]
+                        if (aparameter["type"].endswith("::*")
+                            and (")" in aparameter["name"])):
+                            self._check_name(
+                                context,
+                                Identifier(class_method_re,
+                                           re.match(r"(\w+).*", aparameter["name"]).group(1),
+                                           line_number, scope=scope),
+                                self._make_identifier(amethod, "define_function", scope))
+                        else:
+                            self._check_name(
+                                context,
+                                Identifier(class_method_argument_re,
+                                           self._get_argument_name(aparameter),
+                                           line_number, scope=scope))
+                else:
+                    self._check_name(
+                        context,
+                        Identifier("typedef", matched.group(1),
+                                   amethod["line_number"], scope=scope))
+
+            for access_specifier in CppHeaderParser.supportedAccessSpecifier:
+                for amember in cpp_object["properties"][access_specifier]:
+                    is_skip_validate = False
+                    if ("type" in amember) and (amember["type"] is not None):
+                        internal_predeclares = ["class", "struct", "union"]
+                        if amember["type"] in internal_predeclares:
+                            is_skip_validate = True
+
+                    if not is_skip_validate:
+                        if amember["static"]:
+                            kind = "static_variant"
+                        else:
+                            kind = class_variant_re
+                        self._check_name(
+                            context, self._make_identifier(amember, kind, scope))
+
+                for amember in cpp_object["structs"][access_specifier]:
+                    self._validate_cpp_object(context, amember)
+
+                for amember in cpp_object["enums"][access_specifier]:
+                    self._validate_cpp_object(context, amember)
+
+        elif cpp_object_type == CppHeaderParser.CppStruct:
+            self._check_name(
+                context, self._make_identifier(cpp_object, "struct"))
+
+        elif cpp_object_type == CppHeaderParser.CppEnum:
+            self._check_name(
+                context, self._make_identifier(cpp_object, "enum"))
+
+            line_number = cpp_object.get("line_number", -1)
+            scope = cpp_object.get("name", None)
+            for amember in cpp_object["values"]:
+                identifier = self._make_identifier(amember, "enum_value", scope)
+                # Use parent line number if enum value does not have it's line
+                # number
+                if "line_number" not in amember:
+                    identifier.line_number = line_number
+                self._check_name(context, identifier)
+
+        elif cpp_object_type == CppHeaderParser.CppVariable:
+            if cpp_object["type"] != "return":
+                if cpp_object["static"]:
+                    self._check_name(context, self._make_identifier(
+                        cpp_object, "static_variant"))
+                elif cpp_object["type"] not in ["class", "struct", "union"]:
+                    if not cpp_object["type"].endswith("::"):
+                        # Don't parse variable that implemented outside of
+                        # template class. It's already be parsed when parsing
+                        # the class.
+                        self._check_name(context, self._make_identifier(
+                            cpp_object, "global_variant"))
+
+        elif cpp_object_type == CppHeaderParser.CppMethod:
+            # Exclude "main" function while parsing global function
+            while True:
+                # FIXME: Parse special case : "struct RArraySize <T ( & ) [ N ]> {"
+                if "debug" in cpp_object:
+                    if re.match(r".*\>\s*{$", cpp_object["debug"]) is not None:
+                        break
+
+                self._validate_codes_of_cpp_method(context, cpp_object)
+                if cpp_object["name"] == "main":
+                    break
+
+                if self._is_special_method(cpp_object):
+                    break
+
+                if (cpp_object["class"] is None) or (len(cpp_object["class"]) <= 0):
+                    if ">" in cpp_object["name"]:
+                        regex = r"^[^<:]*?(?:(\w+)::)?(\w+)\s*<"
+                        matched = re.search(regex, cpp_object["debug"])
+                        if matched.group(1) is not None:
+                            cpp_object["class"] = matched.group(1)
+
+                        cpp_object["name"] = matched.group(2)
+                        self._check_name(context, self._make_identifier(
+                            cpp_object, "class_method", cpp_object["class"]))
+                    elif len(cpp_object["returns"]) > 0:
+                        # If a function does not have return value(at least
+                        # "void"), it maybe macro invokes.
+
+                        # FIXME: We just ignored this situation:
+                        # Code Snippets: static RSignal<void(int)> sReceived;
+                        if "<" not in cpp_object["name"]:
+                            self._check_name(context, self._make_identifier(
+                                cpp_object, "function"))
+
+                    break
+
+                if self._get_class_realname(cpp_object["class"]) == cpp_object["name"]:
+                    # Constructor / Destructor will the same with class name
+                    break
+
+                self._check_name(context, self._make_identifier(
+                    cpp_object, "class_method", cpp_object["class"]))
+                break
+
+        elif cpp_object_type == CppHeaderParser.CppUnion:
+            self._check_name(
+                context, self._make_identifier(cpp_object, "union"))
+
+    def check(self, path_or_source, file_path=None):
+        """Validate a file and return it's diagnostics.
+
+        When file_path is given, path_or_source is the source text or bytes
+        of it, otherwise it's the path of the file to read.
+        """
+        if file_path is None:
+            return self.check_file(path_or_source)[1]
+
+        return self.check_source(file_path, path_or_source)[1]
+
+    def check_file(self, file_path, stats=None):
+        """Validate a source file, return (exit code, diagnostics)
+
+        IOError / OSError raised if the file could not be read.
+        """
+        start_time = default_timer()
+        with open_source(file_path) as content:
+            # Decoded here, so the mapping could be closed soon
+            source = decode_source(content)
+
+        if stats is not None:
+            stats.add_phase("read", default_timer() - start_time)
+
+        return self.check_source(file_path, source, stats)
+
+    def check_source(self, file_path, source, stats=None):
+        """Validate source codes given as text or bytes (any bytes like
+        object, like a memory mapped file).
+
+        file_path is only used for the filename rule and the diagnostics,
+        nothing read from it. Return (exit code, diagnostics). Time spent
+        in each phase is added to stats if a FileStats given.
+        """
+        return self._finish(self._collect(file_path, source, stats), stats)
+
+    def check_pair(self, header_path, header_source, source_path,
+                   source_source, header_stats=None, source_stats=None):
+        """Validate a header and it's implementation file together.
+
+        Identifiers of the implementation file declared in the header too
+        (same scope, name and kind), like out of line method definitions,
+        are only validated and reported in the header. Return
+        [(exit code, diagnostics) of header, (...) of source].
+        """
+        header_context = self._collect(header_path, header_source, header_stats)
+        source_context = self._collect(source_path, source_source, source_stats)
+        if (isinstance(header_context, _CheckContext)
+            and isinstance(source_context, _CheckContext)):
+            self._drop_declared(source_context, header_context)
+
+        return [self._finish(header_context, header_stats),
+                self._finish(source_context, source_stats)]
+
+    def _collect(self, file_path, source, stats):
+        """Collect identifiers of the source, return the context, or a
+        warning Diagnostic if the file could not be parsed.
+        """
+        # Parser imported before the timing, or the first file would pay for
+        # it in it's phases
+        if self.frontend == FRONTEND_LITE:
+            collect = self._collect_lite
+            parse_error = ()
+        else:
+            import CppHeaderParser
+
+            collect = self._collect_parsed
+            parse_error = CppHeaderParser.CppHeaderParser.CppParseError
+
+        start_time = default_timer()
+        if not isinstance(source, six.text_type):
+            source = decode_source(source)
+
+        try:
+            return collect(file_path, source, stats, start_time)
+        except parse_error as e:
+            raise_swallowed(e)
+            # CppHeaderParser can't parse this file, but we should pass
+            # it, this is the CppHeaderParser's problem.
+            return Diagnostic(file_path, severity="warning",
+                message="Failed to parse %s : %s" % (file_path, e))
+        except (FileTimeoutError, MemoryError):
+            raise
+        except Exception as e:
+            raise_swallowed(e)
+            # Unexpected parse tree, fail this file only
+            return self._get_failure(file_path, e)
+
+    def _get_failure(self, file_path, error):
+        if self.debug:
+            import traceback
+            traceback.print_exc()
+        return Diagnostic.from_exception(file_path, error)
+
+    def _finish(self, context, stats):
+        """Validate the collected identifiers, return (exit code, diagnostics)"""
+        if isinstance(context, Diagnostic):
+            return (1 if context.severity == "error" else 0), [context]
+
+        start_time = default_timer()
+        try:
+            diagnostics = self._validate_identifiers(context)
+        except (FileTimeoutError, MemoryError):
+            raise
+        except Exception as e:
+            return 1, [self._get_failure(context.file_path, e)]
+        if stats is not None:
+            stats.add_phase("validate", default_timer() - start_time)
+
+        if len(diagnostics) > 0:
+            return 1, diagnostics
+
+        return 0, []
+
+    def _get_identifier_key(self, identifier):
+        scope = identifier.scope
+        if scope is not None:
+            # "foo_t<T>" and "ns::foo_t" in definitions are "foo_t" of the
+            # header
+            scope = scope.split("<")[0].split("::")[-1].strip()
+
+        return (scope, identifier.name,
+                _PAIRED_KINDS.get(identifier.kind, identifier.kind))
+
+    def _drop_declared(self, context, declared_context):
+        """Remove identifiers of context already collected by declared_context"""
+        declared_keys = set([self._get_identifier_key(identifier)
+            for identifier in declared_context.identifiers])
+
+        identifiers = []
+        fallbacks = dict()
+        for index, identifier in enumerate(context.identifiers):
+            if self._get_identifier_key(identifier) in declared_keys:
+                continue
+
+            fallback = context.fallbacks.get(index, None)
+            if fallback is not None:
+                fallbacks[len(identifiers)] = fallback
+            identifiers.append(identifier)
+
+        context.identifiers = identifiers
+        context.fallbacks = fallbacks
+
+    def _collect_parsed(self, file_path, source, stats, start_time):
+        """Collect identifiers by CppHeaderParser, return the context"""
+        # Shared by the parser and _validate_codes_of_cpp_method()
+        context = _CheckContext(file_path, SourceScanner(source), stats)
+        if stats is not None:
+            parse_start_time = default_timer()
+            stats.add_phase("index", parse_start_time - start_time)
+
+        parsed_info, namespaces = self._parse(source)
+
+        if stats is None:
+            self._validate_parsed(context, parsed_info, namespaces)
+            return context
+
+        traverse_start_time = default_timer()
+        stats.add_phase("parse", traverse_start_time - parse_start_time)
+        body_seconds = stats.phase_seconds["body"]
+        try:
+            self._validate_parsed(context, parsed_info, namespaces)
+        finally:
+            # Function bodies are checked during the traversal
+            stats.add_phase("traverse",
+                default_timer() - traverse_start_time
+                - (stats.phase_seconds["body"] - body_seconds))
+        return context
+
+    def _collect_lite(self, file_path, source, stats, start_time):
+        from ncstyler import lite
+
+        # Function bodies are found while streaming, no index needed
+        context = _CheckContext(file_path, None, stats)
+        self._check_name(context, Identifier(
+            "filename", os.path.basename(file_path)))
+
+        records = lite.extract_identifiers(source)
+        if stats is not None:
+            traverse_start_time = default_timer()
+            stats.add_phase("parse", traverse_start_time - start_time)
+
+        fallback_kinds = lite.FALLBACK_KINDS
+        for identifier in records:
+            fallback = None
+            if identifier.kind in fallback_kinds:
+                fallback = Identifier(
+                    fallback_kinds[identifier.kind], identifier.name,
+                    identifier.line_number, identifier.column,
+                    identifier.scope)
+            self._check_name(context, identifier, fallback)
+
+        if stats is not None:
+            stats.add_phase("traverse", default_timer() - traverse_start_time)
+        return context
+
+    def _parse(self, source):
+        """Parse source, return the parsed info and the namespaces in it"""
+        import CppHeaderParser
+
+        with _parser_lock:
+            # CppHeaderParser never resets these class level states, they
+            # leak names of previous files while checking many files
+            del CppHeaderParser.CppHeaderParser.Resolver.NAMESPACES[:]
+            CppHeaderParser.CppHeaderParser.Resolver.SubTypedefs.clear()
+
+            # It prints parse errors and warnings to stdout, they would
+            # break the streamed formats there
+            stdout = sys.stdout
+            sys.stdout = sys.stderr
+            try:
+                parsed_info = CppHeaderParser.CppHeader(
+                    source, argType="string")
+            finally:
+                sys.stdout = stdout
+            # It's the class level list, cleared by next parsing
+            return parsed_info, list(parsed_info.namespaces)
+
+    def _validate_parsed(self, context, parsed_info, namespaces):
+        # Verify File Names
+        self._check_name(context, Identifier(
+            "filename", os.path.basename(context.file_path)))
+
+        # Verify Define Names, scanned from the source in one pass, they
+        # have line numbers there
+        for identifier in scan_defines(context.source.text):
+            self._check_name(context, identifier)
+
+        # Verify Function Names
+        for cpp_object in parsed_info.functions:
+            self._validate_cpp_object(context, cpp_object)
+
+        # Verify Class Names
+        for cpp_object in parsed_info.classes_order:
+            self._validate_cpp_object(context, cpp_object)
+
+        # Verify Struct Names
+        for cpp_object in parsed_info.structs_order:
+            self._validate_cpp_object(context, cpp_object)
+
+        # Verify Enum Names
+        for cpp_object in parsed_info.enums:
+            self._validate_cpp_object(context, cpp_object)
+
+        # Verify Variable Names
+        for cpp_object in parsed_info.variables:
+            # Avoid checking member variable inside function body.
+            if '{' not in cpp_object['type']:
+                self._validate_cpp_object(context, cpp_object)
+
+        for namespace in namespaces:
+            self._check_name(context, Identifier("namespace", namespace))
+
+        # Verify Typdef Names
+        for cpp_object in parsed_info.typedefs:
+            self._validate_cpp_object(context, cpp_object)
+
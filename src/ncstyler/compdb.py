@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+
+import re
+import os
+import os.path
+import json
+import shlex
+from ncstyler.scanner import decode_source
+
+_INCLUDE_RE = re.compile(
+    r'^[ \t]*#[ \t]*include[ \t]*([<"])([^>"\n]+)[>"]', re.MULTILINE)
+
+# Options followed by a user include directory, "-I dir" or "-Idir"
+_QUOTE_DIR_OPTIONS = ("-iquote",)
+_INCLUDE_DIR_OPTIONS = ("-I", "/I", "--include-directory")
+# System include directories, headers found there are not project's
+_SYSTEM_DIR_OPTIONS = ("-isystem", "-idirafter", "-imsvc", "/external:I")
+
+class CompilationDatabaseError(Exception):
+    pass
+
+class TranslationUnit(object):
+    """A source file of compile_commands.json with it's include directories"""
+
+    __slots__ = ("file_path", "quote_dirs", "include_dirs")
+
+    def __init__(self, file_path, quote_dirs, include_dirs):
+        self.file_path = file_path
+        # Searched for "..." includes only, before include_dirs
+        self.quote_dirs = quote_dirs
+        self.include_dirs = include_dirs
+
+def _get_arguments(entry):
+    if "arguments" in entry:
+        return entry["arguments"]
+
+    return shlex.split(entry["command"], posix=(os.name != "nt"))
+
+def _parse_include_dirs(arguments, directory):
+    quote_dirs = []
+    include_dirs = []
+    i = 0
+    while i < len(arguments):
+        argument = arguments[i]
+        i += 1
+        for options, dirs in ((_QUOTE_DIR_OPTIONS, quote_dirs),
+                              (_INCLUDE_DIR_OPTIONS, include_dirs),
+                              (_SYSTEM_DIR_OPTIONS, None)):
+            option = None
+            for an_option in options:
+                if argument.startswith(an_option):
+                    option = an_option
+                    break
+            if option is None:
+                continue
+
+            value = argument[len(option):].lstrip("=")
+            if (len(value) <= 0) and (i < len(arguments)):
+                value = arguments[i]
+                i += 1
+            if dirs is not None:
+                dirs.append(os.path.normpath(os.path.join(directory, value)))
+            break
+
+    return quote_dirs, include_dirs
+
+def load_translation_units(compdb_path):
+    """Return TranslationUnit of every entry of a compile_commands.json, the
+    same file compiled several times only appears once.
+    """
+    try:
+        with open(compdb_path, "r") as compdb_file:
+            entries = json.load(compdb_file)
+    except (IOError, OSError, ValueError) as e:
+        raise CompilationDatabaseError(
+            "Failed to load compilation database '%s' : %s" % (compdb_path, e))
+
+    units = []
+    founded = set()
+    for entry in entries:
+        try:
+            directory = entry.get("directory", os.path.dirname(compdb_path))
+            directory = os.path.join(os.path.dirname(compdb_path), directory)
+            file_path = os.path.normpath(os.path.join(directory, entry["file"]))
+            arguments = _get_arguments(entry)
+        except (KeyError, ValueError) as e:
+            raise CompilationDatabaseError(
+                "Invalid entry in '%s' : %s" % (compdb_path, e))
+
+        file_path = os.path.abspath(file_path)
+        if file_path in founded:
+            continue
+        founded.add(file_path)
+
+        quote_dirs, include_dirs = _parse_include_dirs(
+            arguments, os.path.abspath(directory))
+        units.append(TranslationUnit(file_path, quote_dirs, include_dirs))
+
+    return units
+
+def _common_directory(paths):
+    parts = None
+    for apath in paths:
+        path_parts = os.path.abspath(apath).split(os.sep)
+        if parts is None:
+            parts = path_parts
+            continue
+
+        size = 0
+        for a, b in zip(parts, path_parts):
+            if a != b:
+                break
+            size += 1
+        parts = parts[:size]
+
+    if (parts is None) or (parts == [""]):
+        return os.sep
+    return os.sep.join(parts)
+
+def _find_includes(file_path, quote_dirs, include_dirs):
+    """Yield paths of existing files included by file_path"""
+    try:
+        with open(file_path, "rb") as source_file:
+            text = decode_source(source_file.read())
+    except (IOError, OSError):
+        return
+
+    for matched in _INCLUDE_RE.finditer(text):
+        if matched.group(1) == '"':
+            search_dirs = [os.path.dirname(file_path)] + quote_dirs + include_dirs
+        else:
+            search_dirs = include_dirs
+
+        for search_dir in search_dirs:
+            include_path = os.path.normpath(
+                os.path.join(search_dir, matched.group(2)))
+            if os.path.isfile(include_path):
+                yield include_path
+                break
+
+def get_project_files(compdb_path, root=None, is_included=None):
+    """Return translation units of the compilation database and the headers
+    included by them, each file once.
+
+    Only headers inside root are picked up, default root is the common
+    directory of the database and the translation units. Headers are found
+    by following #include directives through the include directories of the
+    first translation unit including them. Files is_included() is false for
+    are neither returned nor read to follow their includes.
+    """
+    units = load_translation_units(compdb_path)
+    if is_included is not None:
+        units = [unit for unit in units if is_included(unit.file_path)]
+    if root is None:
+        root = _common_directory(
+            [os.path.dirname(os.path.abspath(compdb_path))]
+            + [os.path.dirname(unit.file_path) for unit in units])
+    root = os.path.join(os.path.abspath(root), "")
+
+    file_paths = []
+    founded = set()
+    for unit in units:
+        founded.add(unit.file_path)
+        file_paths.append(unit.file_path)
+
+    for unit in units:
+        pending = [unit.file_path]
+        while len(pending) > 0:
+            for include_path in _find_includes(
+                    pending.pop(), unit.quote_dirs, unit.include_dirs):
+                include_path = os.path.abspath(include_path)
+                if include_path in founded:
+                    continue
+                if not include_path.startswith(root):
+                    continue
+                if (is_included is not None) and (not is_included(include_path)):
+                    continue
+
+                founded.add(include_path)
+                file_paths.append(include_path)
+                pending.append(include_path)
+
+    return file_paths
@@ -1,35 +1,42 @@
 #!/usr/bin/env python
 
 import argparse
-import CppHeaderParser
-import re
 import sys
-import yaml
-import copy
 import six
+import os
 import os.path
-import traceback
-
-class CppDefine(dict):
-    def __init__(self):
-        self["name"] = None
-        self["parameters"] = []
-        self["line_number"] = -1
-
-class CppDefineParameter(dict):
-    def __init__(self):
-        self["name"] = None
-        self["line_number"] = -1
-
-class CppNamespace(dict):
-    def __init__(self):
-        self["name"] = None
-        self["line_number"] = -1
-
-class CppFileName(dict):
-    def __init__(self):
-        self["name"] = None
-        self["line_number"] = -1
+import glob
+import json
+import itertools
+import functools
+import contextlib
+from timeit import default_timer
+from ncstyler.rules import RuleTable
+from ncstyler.checker import Checker, FRONTENDS, FRONTEND_CPPHEADERPARSER
+from ncstyler.diagnostics import Diagnostic
+from ncstyler.stats import FileStats, RunStats
+from ncstyler.formatters import FORMATS, create_formatter
+from ncstyler.scanner import open_source, decode_source
+from ncstyler.guards import FileTimeoutError, time_limit, set_memory_limit
+from ncstyler.cache import ResultCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE
+
+# Modules only some modes need (multiprocessing, the server, git and
+# compilation database support) are imported by those modes, a hook checking
+# one file should not pay for them at startup.
+
+# Suffixes of files picked up while expanding directories given on the
+# command line
+SOURCE_FILE_SUFFIXES = (
+    ".h", ".hh", ".hpp", ".hxx", ".h++", ".inl",
+    ".c", ".cc", ".cpp", ".cxx", ".c++",
+)
+
+# Suffixes of header and implementation files paired by --pair
+HEADER_FILE_SUFFIXES = (".h", ".hh", ".hpp", ".hxx", ".h++")
+IMPLEMENTATION_FILE_SUFFIXES = (".c", ".cc", ".cpp", ".cxx", ".c++")
+
+# Formats could be written endlessly, for --watch
+_STREAM_FORMATS = ("text", "gcc", "jsonl")
 
 class Application(object):
     def __init__(self):
@@ -38,490 +45,949 @@ class Application(object):
 
         parser = argparse.ArgumentParser(description=description)
         parser.add_argument("-c", "--config",
-            help="Configuration file path (In YAML format)",
-            required=True)
-        parser.add_argument("-o", "--output", help="Output file path")
-        parser.add_argument("-d", "--debug", action='store_true', help="Print trace stack")
-        parser.add_argument("file_path", help="Source file path")
+            help="Configuration file path (In YAML format)")
+        parser.add_argument("-o", "--output",
+            help="Output file path, default the standard output")
+        parser.add_argument("--format", choices=FORMATS, default="text",
+            help="Format of the diagnostics, written as soon as each file "
+            "checked (default: %(default)s)")
+        parser.add_argument("-d", "--debug", action='store_true',
+            help="Print the traceback of files failed to check")
+        parser.add_argument("-j", "--jobs", type=int, default=1,
+            help="Number of worker processes, 0 means one per CPU core")
+        parser.add_argument("--max-errors", type=int, default=0,
+            help="Stop checking a file after this many errors, 0 means report all")
+        parser.add_argument("--frontend", choices=FRONTENDS,
+            default=FRONTEND_CPPHEADERPARSER,
+            help="Parser extracting the identifiers, 'lite' streams tokens "
+            "without building CppHeaderParser's parse tree "
+            "(default: %(default)s)")
+        parser.add_argument("--fix", action='store_true',
+            help="Rename the violating names in place by the fix transforms "
+            "of their rules in the configuration, report the others")
+        parser.add_argument("--diff", action='store_true',
+            help="With --fix, write the unified diff of the renames instead "
+            "of changing the files")
+        parser.add_argument("--baseline", metavar="PATH",
+            help="Do not report the known violations recorded in baseline "
+            "file PATH")
+        parser.add_argument("--write-baseline", metavar="PATH",
+            help="Record all violations found to baseline file PATH instead "
+            "of reporting them")
+        parser.add_argument("--pair", action='store_true',
+            help="Check a header and it's implementation file of the same "
+            "name (foo.h and foo.cpp) together, names declared in the header "
+            "are only checked and reported there")
+        parser.add_argument("--max-file-size", type=int, default=0,
+            metavar="KIB",
+            help="Skip files larger than KIB KiB without reading them, 0 "
+            "means no limit")
+        parser.add_argument("--timeout", type=float, default=0,
+            metavar="SECONDS",
+            help="Skip a file if checking it takes longer than SECONDS, 0 "
+            "means no limit")
+        parser.add_argument("--max-memory", type=int, default=0,
+            metavar="MIB",
+            help="Limit the memory of each checking process to MIB MiB, "
+            "files running out of it are skipped, 0 means no limit")
+        parser.add_argument("--prefetch", type=int, default=0, metavar="N",
+            help="Read up to N files ahead in background threads and send "
+            "their contents to the checking processes, so reading overlaps "
+            "with parsing on slow (network) filesystems, 0 means each "
+            "process reads it's files")
+        parser.add_argument("--no-cache", action='store_true',
+            help="Do not read or write the result cache")
+        parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+            help="Result cache directory (default: %(default)s)")
+        parser.add_argument("--cache-max-size", type=int,
+            default=DEFAULT_MAX_SIZE // (1024 * 1024),
+            help="Maximum size of result cache in MiB (default: %(default)s)")
+        parser.add_argument("--profile", action='store_true',
+            help="Print time of each phase, identifiers checked per rule, "
+            "the slowest files and rules to stderr")
+        parser.add_argument("--stats", metavar="PATH",
+            help="Save the profiling statistics to PATH in JSON format")
+        parser.add_argument("--since", metavar="REV",
+            help="Only check files changed since git revision REV and only "
+            "report violations in the changed lines")
+        parser.add_argument("--staged", action='store_true',
+            help="Only check the staged content of staged files and only "
+            "report violations in the staged lines")
+        parser.add_argument("--compdb", metavar="PATH",
+            help="Check the translation units of compilation database PATH "
+            "(compile_commands.json) and the project headers they include, "
+            "each file once, the largest files first")
+        parser.add_argument("--watch", action='store_true',
+            help="Check the files, then keep running and check them again "
+            "whenever they change. Directories are watched by inotify, or "
+            "polled where it's unavailable")
+        parser.add_argument("--serve", metavar="SOCKET",
+            help="Run as a server answering check requests on unix socket "
+            "SOCKET, with config and parser kept loaded")
+        parser.add_argument("--connect", metavar="SOCKET",
+            help="Forward checks to the server listening on unix socket "
+            "SOCKET")
+        parser.add_argument("--shutdown", action='store_true',
+            help="Ask the server given by --connect to stop")
+        parser.add_argument("file_paths", nargs="*", metavar="file_path",
+            help="Source file paths, directories or glob patterns. Limits "
+            "the files to check with --since, --staged or --compdb")
 
         self.__args = parser.parse_args()
+        self.__changed_files = None
+        self.__is_profiling = self.__args.profile or (self.__args.stats is not None)
+        if (len(self.__args.file_paths) <= 0
+            and (self.__args.since is None)
+            and (not self.__args.staged)
+            and (self.__args.compdb is None)
+            and (self.__args.serve is None)
+            and (not self.__args.shutdown)):
+            parser.error("file_path is required without --since, --staged "
+                         "or --compdb")
+        if self.__args.shutdown and (self.__args.connect is None):
+            parser.error("--shutdown requires --connect")
+        if self.__args.diff and (not self.__args.fix):
+            parser.error("--diff requires --fix")
+        if self.__args.fix:
+            if (self.__args.watch or (self.__args.connect is not None)
+                or (self.__args.write_baseline is not None)):
+                parser.error("--fix can't be used with --watch, --connect "
+                             "or --write-baseline")
+            if self.__args.diff and (self.__args.format != "text"):
+                parser.error("--diff only writes text format")
+        if self.__args.pair and (self.__args.connect is not None):
+            parser.error("--pair can't be used with --connect")
+        if (self.__args.prefetch > 0) and (self.__args.connect is not None):
+            parser.error("--prefetch can't be used with --connect")
+        if self.__args.watch:
+            if self.__args.write_baseline is not None:
+                parser.error("--watch can't be used with --write-baseline")
+            if len(self.__args.file_paths) <= 0:
+                parser.error("--watch requires file_path")
+            if ((self.__args.since is not None) or self.__args.staged
+                or (self.__args.compdb is not None)
+                or (self.__args.serve is not None)
+                or (self.__args.connect is not None)):
+                parser.error("--watch can't be used with --since, --staged, "
+                             "--compdb, --serve or --connect")
+            if self.__args.format not in _STREAM_FORMATS:
+                parser.error("--watch only supports --format %s" % (
+                    ", ".join(_STREAM_FORMATS)))
+
+        # Rules are applied by the server while forwarding to it
+        self._rules = None
+        self._checker = None
+        if self.__args.connect is None:
+            if self.__args.config is None:
+                parser.error("-c/--config is required")
+            config_cache_dir = None
+            if not self.__args.no_cache:
+                config_cache_dir = self.__args.cache_dir
+            self._rules = RuleTable.from_file(self.__args.config,
+                                              config_cache_dir)
+            self._checker = Checker(self._rules,
+                                    max_errors=self.__args.max_errors,
+                                    debug=self.__args.debug,
+                                    frontend=self.__args.frontend)
+
+        self._fixer = None
+        # Implementation file -> header of it's --pair unit, and FileFix of
+        # the headers fixed, their renames are applied to the partners too
+        self._partners = dict()
+        self._paired_headers = set()
+        self._header_fixes = dict()
+        if self.__args.fix:
+            from ncstyler.fixer import Fixer
+
+            try:
+                self._fixer = Fixer(self._rules)
+            except ValueError as e:
+                parser.error("Wrong fix transform : %s" % e)
+
+        self._baseline = None
+        self._new_baseline = None
+        if self.__args.baseline is not None:
+            from ncstyler.baseline import Baseline, BaselineError
+
+            try:
+                self._baseline = Baseline.load(self.__args.baseline)
+            except BaselineError as e:
+                parser.error(str(e))
+        if self.__args.write_baseline is not None:
+            from ncstyler.baseline import Baseline
+
+            self._new_baseline = Baseline(
+                os.path.dirname(os.path.abspath(self.__args.write_baseline)))
+
+        self._cache = None
+        if (not self.__args.no_cache) and (self._rules is not None):
+            self._cache = ResultCache(self.__args.cache_dir,
+                                      self.__args.cache_max_size * 1024 * 1024)
+
+    def _expand_file_paths(self, paths):
+        file_paths = []
+        for apath in paths:
+            if glob.has_magic(apath):
+                matched_paths = sorted(glob.glob(apath))
+            else:
+                matched_paths = [apath]
+
+            for matched_path in matched_paths:
+                if not os.path.isdir(matched_path):
+                    file_paths.append(matched_path)
+                    continue
+
+                for root, dir_names, file_names in os.walk(matched_path):
+                    dir_names.sort()
+                    for file_name in sorted(file_names):
+                        if file_name.lower().endswith(SOURCE_FILE_SUFFIXES):
+                            file_paths.append(os.path.join(root, file_name))
+
+        # Remove duplicated paths but keep the order user gave
+        founded = set()
+        result = []
+        for file_path in file_paths:
+            normalized_path = os.path.normpath(file_path)
+            if normalized_path in founded:
+                continue
+
+            founded.add(normalized_path)
+            result.append(file_path)
 
-        # If user does not specific output path, we default it to input file
-        # path
-        if self.__args.output is None:
-            self.__args.output = self.__args.file_path
-
-        self.__config = yaml.load(open(self.__args.config))
-        old_base = self.__config["_base_"]
-        self.__config["_base_"] = {
-            "re":"[a-zA-Z0-9_]+",
-            "error": "",
-            }
-        self.__config["_base_"].update(old_base)
-
-    def parse_define(self, adefine):
-        matched = re.match(r"[^\w]*(\w+)(?:\(([^\)]*)\)|\s*).*", adefine)
-        name = matched.group(1)
-        parameters = []
-        if matched.group(2) is not None:
-            parameter_names = matched.group(2).split(',')
-            for parameter_name in parameter_names:
-                aparameter = CppDefineParameter()
-                aparameter["name"] = parameter_name.strip()
-                parameters.append(aparameter)
-
-        result = CppDefine()
-        result["name"] = name
-        result["parameters"] = parameters
         return result
 
-    def _is_special_method(self, amethod):
-        if isinstance(amethod, six.string_types):
-            amethod_name = amethod
-        else:
-            amethod_name = amethod["name"]
-
-        founded = re.findall(r"(?:^|[^\w]+)operator[^\w]+", amethod_name)
-        if len(founded) <= 0:
-            if re.match(r"(?:^|.*\W)operator\W.*", amethod["debug"]) is not None:
-                return True
+    @contextlib.contextmanager
+    def _open_source(self, file_path):
+        """Yield content of a file to check, the staged one with --staged,
+        lines of it are the ones the staged diff is about
+        """
+        if not self.__args.staged:
+            with open_source(file_path) as content:
+                yield content
+            return
 
-            return False
+        from ncstyler.gitdiff import read_staged_file, GitError
 
-        return True
+        try:
+            content = read_staged_file(file_path)
+        except GitError as e:
+            raise IOError("Failed to read staged %s : %s" % (file_path, e))
+        yield content
 
-    def _get_argument_name(self, an_argument):
-        if isinstance(an_argument, six.string_types):
-            return an_argument
+    def check_file(self, file_path, stats=None):
+        """Validate one source file, return (exit code, diagnostics)"""
+        try:
+            start_time = default_timer()
+            reason = self._get_oversize_reason(file_path)
+            if reason is not None:
+                return self._skip_file(file_path, reason)
+
+            with time_limit(self.__args.timeout):
+                with self._open_source(file_path) as content:
+                    return self._check_content(file_path, content, stats,
+                                               start_time)
+        except (FileTimeoutError, MemoryError) as e:
+            return self._skip_file(file_path, self._get_guard_reason(e))
+        except (IOError, OSError) as e:
+            # Report unreadable file and let the other files go on
+            return 1, [Diagnostic(file_path, message=str(e))]
+        except Exception as e:
+            return 1, [Diagnostic.from_exception(file_path, e)]
+
+    def check_pair(self, header_path, source_path, header_stats=None,
+                   source_stats=None):
+        """Validate a header and it's implementation file together, return
+        [(exit code, diagnostics) of header, (...) of source]
+        """
+        try:
+            start_time = default_timer()
+            if ((self._get_oversize_reason(header_path) is not None)
+                or (self._get_oversize_reason(source_path) is not None)):
+                return [self.check_file(header_path, header_stats),
+                        self.check_file(source_path, source_stats)]
+
+            with time_limit(self.__args.timeout):
+                with self._open_source(header_path) as header_content:
+                    with self._open_source(source_path) as source_content:
+                        return self._check_pair_contents(
+                            header_path, header_content,
+                            source_path, source_content,
+                            header_stats, source_stats, start_time)
+        except (FileTimeoutError, MemoryError) as e:
+            reason = self._get_guard_reason(e)
+            return [self._skip_file(header_path, reason),
+                    self._skip_file(source_path, reason)]
+        except (IOError, OSError):
+            # Let check_file() report which one is too large or unreadable
+            return [self.check_file(header_path, header_stats),
+                    self.check_file(source_path, source_stats)]
+        except Exception as e:
+            return [(1, [Diagnostic.from_exception(file_path, e)])
+                for file_path in (header_path, source_path)]
+
+    def _read_unit(self, unit):
+        """Contents of files of the unit, read ahead by --prefetch. Oversized
+        and unreadable files are None, the worker checks them as usual to
+        report why.
+        """
+        contents = []
+        for file_path in unit:
+            try:
+                if self._get_oversize_reason(file_path) is not None:
+                    contents.append(None)
+                    continue
+                if self.__args.staged:
+                    from ncstyler.gitdiff import read_staged_file
+                    contents.append(read_staged_file(file_path))
+                    continue
+                with open(file_path, "rb") as source_file:
+                    contents.append(source_file.read())
+            except Exception:
+                contents.append(None)
+        return contents
+
+    def _check_prefetched_for_report(self, prefetched):
+        """Like _check_unit_for_report() but with contents already read"""
+        unit, contents = prefetched
+        if None in contents:
+            return self._check_unit_for_report(unit)
+
+        stats = [None] * len(unit)
+        if self.__is_profiling:
+            stats = [FileStats(file_path) for file_path in unit]
+
+        start_time = default_timer()
+        try:
+            with time_limit(self.__args.timeout):
+                if len(unit) > 1:
+                    results = self._check_pair_contents(
+                        unit[0], contents[0], unit[1], contents[1],
+                        stats[0], stats[1], start_time)
+                else:
+                    results = [self._check_content(
+                        unit[0], contents[0], stats[0], start_time)]
+        except (FileTimeoutError, MemoryError) as e:
+            reason = self._get_guard_reason(e)
+            results = [self._skip_file(file_path, reason)
+                for file_path in unit]
+        except Exception as e:
+            results = [(1, [Diagnostic.from_exception(file_path, e)])
+                for file_path in unit]
+
+        return [(exit_code, diagnostics, file_stats) for
+            (exit_code, diagnostics), file_stats in zip(results, stats)]
+
+    def _get_guard_reason(self, error):
+        if isinstance(error, FileTimeoutError):
+            return "checking took longer than %s seconds" % self.__args.timeout
+        if self.__args.max_memory <= 0:
+            return "checking ran out of memory"
+        return "checking ran out of %s MiB memory" % self.__args.max_memory
+
+    def _check_pair_contents(self, header_path, header_content, source_path,
+                             source_content, header_stats, source_stats,
+                             start_time):
+        if self._cache is None:
+            if header_stats is not None:
+                header_stats.add_phase("read", default_timer() - start_time)
+            return self._checker.check_pair(
+                header_path, header_content, source_path, source_content,
+                header_stats, source_stats)
+
+        header_key = self._make_cache_key(header_content, header_path)
+        # Result of the implementation file depends on the header too
+        source_key = self._make_cache_key(source_content, source_path,
+                                          header_key)
+        results = [self._get_cached(header_key, header_path),
+                   self._get_cached(source_key, source_path)]
+        if header_stats is not None:
+            header_stats.add_phase("read", default_timer() - start_time)
+            header_stats.is_cached = results[0] is not None
+        if source_stats is not None:
+            source_stats.is_cached = results[1] is not None
+
+        if (results[0] is not None) and (results[1] is not None):
+            return results
+
+        results = self._checker.check_pair(
+            header_path, header_content, source_path, source_content,
+            header_stats, source_stats)
+        for cache_key, (exit_code, diagnostics) in zip(
+                (header_key, source_key), results):
+            self._cache.put(cache_key, exit_code,
+                            [d.to_dict() for d in diagnostics])
+        return results
+
+    def _get_oversize_reason(self, file_path):
+        max_size = self.__args.max_file_size * 1024
+        if max_size <= 0:
+            return None
+
+        file_size = os.path.getsize(file_path)
+        if file_size <= max_size:
+            return None
+
+        return "file size %s bytes exceeds %s KiB" % (
+            file_size, self.__args.max_file_size)
+
+    def _skip_file(self, file_path, reason):
+        # Skipped files are not failures, like files CppHeaderParser can't
+        # parse, and they are not cached so raising a limit takes effect
+        return 0, [Diagnostic(file_path, severity="warning",
+                              message="Skipped %s : %s" % (file_path, reason))]
+
+    def is_path_included(self, file_path):
+        """Whether the file passes _include_ and _exclude_ of config"""
+        return self._rules.is_path_included(file_path)
+
+    def _apply_memory_limit(self):
+        if self.__args.max_memory > 0:
+            set_memory_limit(self.__args.max_memory * 1024 * 1024)
+
+    def _check_content(self, file_path, content, stats, start_time):
+        if self._cache is None:
+            if stats is not None:
+                stats.add_phase("read", default_timer() - start_time)
+            return self._checker.check_source(file_path, content, stats)
+
+        cache_key = self._make_cache_key(content, file_path)
+        result = self._get_cached(cache_key, file_path)
+        if stats is not None:
+            stats.add_phase("read", default_timer() - start_time)
+            stats.is_cached = result is not None
+
+        if result is not None:
+            return result
+
+        exit_code, diagnostics = self._checker.check_source(
+            file_path, content, stats)
+        self._cache.put(cache_key, exit_code,
+                        [d.to_dict() for d in diagnostics])
+        return exit_code, diagnostics
+
+    def _make_cache_key(self, content, file_path, extra=None):
+        # Results depend on --max-errors and --frontend, so they are a
+        # part of the key
+        config_digest = "%s:%s:%s" % (
+            self._rules.digest, self.__args.max_errors, self.__args.frontend)
+        if extra is not None:
+            config_digest += ":" + extra
+        return self._cache.make_key(
+            content, os.path.basename(file_path), config_digest)
+
+    def _get_cached(self, cache_key, file_path):
+        """Cached (exit code, diagnostics), or None if not cached"""
+        result = self._cache.get(cache_key)
+        if result is None:
+            return None
+
+        exit_code, values = result
+        try:
+            diagnostics = [Diagnostic.from_dict(v) for v in values]
+        except (TypeError, AttributeError):
+            # Written by an other version, check again
+            return None
+        # Entry may be written while checking a same file at other path
+        for adiagnostic in diagnostics:
+            adiagnostic.file_path = file_path
+        return exit_code, diagnostics
+
+    def _check_unit_for_report(self, unit):
+        """Check a file, or a (header, implementation) pair, return
+        [(exit code, diagnostics, stats)] of each file
+        """
+        stats = [None] * len(unit)
+        if self.__is_profiling:
+            stats = [FileStats(file_path) for file_path in unit]
+
+        if len(unit) > 1:
+            results = self.check_pair(unit[0], unit[1], stats[0], stats[1])
+        else:
+            results = [self.check_file(unit[0], stats[0])]
+
+        return [(exit_code, diagnostics, file_stats) for
+            (exit_code, diagnostics), file_stats in zip(results, stats)]
+
+    def _make_units(self, file_paths, is_checked=None):
+        """Group file_paths into units to check, a header and it's
+        implementation file are a unit with --pair if is_checked() of both
+        are true (default: both in file_paths)
+        """
+        if not self.__args.pair:
+            return [(file_path,) for file_path in file_paths]
+
+        if is_checked is None:
+            normalized_paths = set(
+                [os.path.normpath(apath) for apath in file_paths])
+            is_checked = lambda apath: (
+                os.path.normpath(apath) in normalized_paths)
+
+        units = []
+        founded = set()
+        for file_path in file_paths:
+            if os.path.normpath(file_path) in founded:
+                continue
+
+            partner = _find_partner(file_path, is_checked)
+            if partner is None:
+                units.append((file_path,))
+                continue
+
+            founded.add(os.path.normpath(partner))
+            if file_path.lower().endswith(HEADER_FILE_SUFFIXES):
+                units.append((file_path, partner))
+            else:
+                units.append((partner, file_path))
+
+        return units
+
+    def check_source(self, file_path, content):
+        """Validate source content of an unsaved file, like check_file()"""
+        return self._checker.check_source(file_path, content)
+
+    def _get_changed_file_paths(self):
+        from ncstyler.gitdiff import get_changed_files
+
+        self.__changed_files = get_changed_files(
+            self.__args.since, self.__args.staged)
+
+        if len(self.__args.file_paths) > 0:
+            file_paths = self._expand_file_paths(self.__args.file_paths)
+            return [apath for apath in file_paths
+                if os.path.abspath(apath) in self.__changed_files]
+
+        return [apath for apath in sorted(self.__changed_files.keys())
+            if apath.lower().endswith(SOURCE_FILE_SUFFIXES)]
+
+    def _get_compdb_file_paths(self):
+        from ncstyler.compdb import get_project_files
+
+        is_included = None
+        if self._rules is not None:
+            is_included = self.is_path_included
+        file_paths = get_project_files(
+            self.__args.compdb, is_included=is_included)
+        if len(self.__args.file_paths) > 0:
+            limits = set([os.path.abspath(apath) for apath
+                in self._expand_file_paths(self.__args.file_paths)])
+            file_paths = [apath for apath in file_paths if apath in limits]
+
+        # Largest first, so no long file left at the end of the queue while
+        # other workers are idle
+        def get_size(file_path):
+            try:
+                return os.path.getsize(file_path)
+            except OSError:
+                return 0
+
+        return sorted(file_paths, key=get_size, reverse=True)
+
+    def _filter_unchanged(self, file_path, diagnostics):
+        """Drop name violations outside the changed lines of the file"""
+        changed_file = self.__changed_files[os.path.abspath(file_path)]
+        result = []
+        for adiagnostic in diagnostics:
+            if adiagnostic.rule is not None:
+                # Names without line number only reported in new files
+                if adiagnostic.line_number < 1:
+                    if not changed_file.is_new:
+                        continue
+                elif not changed_file.contains_line(adiagnostic.line_number):
+                    continue
+
+            result.append(adiagnostic)
 
-        if len(an_argument["name"]) > 0:
-            return an_argument["name"]
+        return result
 
-        # If it's a functor?? with "class name::function" style
-        matched = re.match(r"^\w+\s*\(\w*::\*(\w+)\)\(.*$", an_argument["type"])
-        if matched is None:
-            # with normal "function" style
-            matched = re.match(r"[^\(]*\([^\)]*\W(\w+)\W.*\).*", an_argument["type"])
+    def _watch(self):
+        from ncstyler.watcher import watch
 
-        if matched is None:
-            return ""
-        else:
-            return matched.group(1)
-
-    def _get_config(self, name):
-        override_table = {
-            "class": "_base_",
-            "function": "_base_",
-            "variant": "_base_",
-            "namespace": "_base_",
-            "define": "_base_",
-            "filename": "_base_", # Special config use to define filename rule
-
-            "argument": "variant",
-            "static_variant": "variant",
-            "global_variant": "variant",
-            "function_argument": "argument",
-            "class_method_argument": "function_argument",
-            "struct_method_argument": "class_method_argument",
-            "define_function_argument": "function_argument",
-            "define_function": "function",
-            "class_method": "function",
-            "struct_method": "class_method",
-            "class_variant": "variant",
-            "struct_variant": "class_variant",
-            "typedef": "class",
-            "struct": "class",
-            "enum": "class",
-            "enum_value": "define",
-            "union": "struct",
-        }
-
-        my_config = dict()
-
-        if name in override_table:
-            base_name = override_table[name]
-            my_config.update(self._get_config(base_name))
-
-        if name in self.__config:
-            my_config.update(self.__config[name])
-
-        return my_config
-
-    def _is_valid_variable(self, cpp_variable):
-        if cpp_variable["type"] == "return":
-            return False
-
-        if len(cpp_variable["type"]) <= 0:
-            return False
-
-        return True
-
-    def _get_cpp_method_re(self, name):
-        prefix = "operator"
-        if not name.startswith(prefix):
-            return re.escape(name)
-
-        # Operator methods
-        chars = []
-        for achar in name[len(prefix):]:
-            chars.append("\\s*")
-            if achar.isalnum():
-                chars.append(achar)
+        roots = []
+        for apath in self.__args.file_paths:
+            if glob.has_magic(apath):
+                roots.extend(sorted(glob.glob(apath)))
             else:
-                chars.append("\\")
-                chars.append(achar)
-
-        return "operator%s" % ''.join(chars)
+                roots.append(apath)
+        # Absolute path -> path as given
+        explicit_paths = dict([(os.path.abspath(apath), apath) for apath
+            in roots if not os.path.isdir(apath)])
+        directories = [os.path.join(os.path.abspath(apath), "") for apath
+            in roots if os.path.isdir(apath)]
+
+        def list_files():
+            return [apath for apath in self._expand_file_paths(roots)
+                if self.is_path_included(apath)]
+
+        def is_watched(file_path):
+            # Files given, or source files in the directories given, not
+            # the others next to the files given (their directories are
+            # watched)
+            absolute_path = os.path.abspath(file_path)
+            if absolute_path not in explicit_paths:
+                if not file_path.lower().endswith(SOURCE_FILE_SUFFIXES):
+                    return False
+                if not any([absolute_path.startswith(directory)
+                            for directory in directories]):
+                    return False
+            return os.path.isfile(file_path) and self.is_path_included(file_path)
 
-    def _validate_codes_of_cpp_method(self, cpp_method):
-        start_line_index = cpp_method["line_number"] - 1
-        # Extract cpp method codes
-        rest_lines = self._source_lines[start_line_index:]
-        content = '\n'.join(rest_lines)
-        code_lines = []
-        name_re = self._get_cpp_method_re(cpp_method["name"])
-        name_start_pos = re.search(name_re, content).span()[0]
+        if self.__args.output is None:
+            stream = sys.stdout
+        else:
+            stream = open(self.__args.output, "w")
+
+        formatter = create_formatter(self.__args.format, stream)
+        formatter.begin()
+
+        def check_files(file_paths, is_checked=None):
+            error_count = 0
+            file_count = 0
+            for unit in self._make_units(file_paths, is_checked):
+                for file_path, (exit_code, diagnostics, stats) in zip(
+                        unit, self._check_unit_for_report(unit)):
+                    exit_code, diagnostics = self._filter_reported(
+                        file_path, exit_code, diagnostics)
+                    formatter.add_file(file_path, diagnostics)
+                    file_count += 1
+                    error_count += len(
+                        [d for d in diagnostics if d.severity == "error"])
+            # Status goes to stderr, keeps the JSONL stream clean
+            sys.stderr.write("Checked %s files, %s errors. Watching for "
+                             "changes ...\n" % (file_count, error_count))
+            sys.stderr.flush()
+
+        def on_changes(file_paths):
+            file_paths = [explicit_paths.get(os.path.abspath(apath), apath)
+                for apath in file_paths if is_watched(apath)]
+            if len(file_paths) > 0:
+                # Changes of a file affect the result of it's partner
+                check_files(file_paths, is_watched)
+
+        self._apply_memory_limit()
+        try:
+            check_files(list_files())
+            watch(roots, list_files, on_changes)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            formatter.end()
+            if stream is not sys.stdout:
+                stream.close()
+            if self._cache is not None:
+                self._cache.prune()
 
-        parameters_start_pos = content.index('(', name_start_pos)
-        parameters_stop_pos = content.index(')', parameters_start_pos)
+        return 0
 
-        stack = []
+    def exec_(self):
+        if self.__args.watch:
+            return self._watch()
+
+        if self.__args.serve is not None:
+            from ncstyler.server import serve, ServerError
+
+            try:
+                serve(self, self.__args.serve)
+            except ServerError as e:
+                print(str(e))
+                return 1
+            finally:
+                if self._cache is not None:
+                    self._cache.prune()
+            return 0
 
-        try:
-            i = content.index('{', parameters_stop_pos + 1)
-        except ValueError:
-            return;
+        if self.__args.shutdown:
+            from ncstyler.server import Client
 
-        try:
-            semicolonPos = content.index(';', parameters_stop_pos + 1)
-            if semicolonPos <= i:
-                return;
-        except ValueError:
-            # Not found a semicolon, just ignored.
-            pass
+            Client(self.__args.connect).shutdown()
+            return 0
 
-        skipped_lines = cpp_method["line_number"] + content.count("\n", 0, i) - 2
-
-        stack.append(i)
-        i += 1
-        first_i = i
-        last_i = 0
-        is_finding_block_comment = False
-        is_finding_single_comment = False
-        while (len(stack) > 0) and (i < len(content)):
-            c = content[i]
-
-            if is_finding_block_comment:
-                # If finding block comment, then skip all other searching
-                if (c == "*") and (content[i + 1] == "/"):
-                    is_finding_block_comment = False
-            elif (c == "/") and (content[i + 1] == "*"):
-                is_finding_block_comment = True
-            elif is_finding_single_comment:
-                # If finding single comment, then skip all other searching
-                if c == "\n":
-                    is_finding_single_comment = False
-            elif (c == "/") and (content[i + 1] == "/"):
-                is_finding_single_comment = True
-            elif c == "{":
-                stack.append(i)
-            elif c == "}":
-                last_i = i
-                del stack[len(stack) - 1]
-
-            i += 1
-
-        if len(stack) <= 0:
-            content = content[first_i:last_i]
-            founded = re.findall(r"\w+\W+(\w+)\s*=[^=]", content)
-            for aname in founded:
-                avariant = dict()
-                avariant["name"] = aname
-                avariant["line_number"] = cpp_method["line_number"]
-                self._validate_name(avariant, "variant")
-
-    def _validate_name(self, cpp_object, name_re):
-        cpp_object_name = ""
-        if isinstance(cpp_object, six.string_types):
-            cpp_object_name = cpp_object
-            cpp_object = dict()
-            cpp_object["name"] = cpp_object_name
-            cpp_object["line_number"] = -1
-        elif "name" in cpp_object:
-            cpp_object_name = cpp_object["name"]
-            if ('<' in cpp_object_name) and ("debug" in cpp_object):
-                matched = re.match(r".*?(\w+)\W+$", cpp_object["debug"])
-                if matched is not None:
-                    cpp_object_name = matched.group(1)
+        if (self.__args.since is not None) or self.__args.staged:
+            from ncstyler.gitdiff import GitError
+
+            try:
+                file_paths = self._get_changed_file_paths()
+            except GitError as e:
+                print(str(e))
+                return 1
+
+            if len(file_paths) <= 0:
+                # Nothing changed, nothing to check
+                return 0
+        elif self.__args.compdb is not None:
+            from ncstyler.compdb import CompilationDatabaseError
+
+            try:
+                file_paths = self._get_compdb_file_paths()
+            except CompilationDatabaseError as e:
+                print(str(e))
+                return 1
         else:
-            return
+            file_paths = self._expand_file_paths(self.__args.file_paths)
 
-        # Parse union like names
-        splitted = cpp_object_name.split()
-        if len(splitted) > 1:
-            cpp_object_name = splitted[-1]
+        if self._rules is not None:
+            # Excluded files are dropped before they are read at all, the
+            # server filters them itself
+            file_paths = [apath for apath in file_paths
+                if self.is_path_included(apath)]
 
-        if '...' in cpp_object_name:
-            # Does not have valid name, we must not check it .
-            return
+        if len(file_paths) <= 0:
+            print("No source file found!")
+            return 1
 
-        if len(cpp_object_name) <= 0:
-            # Does not have valid name, we must not check it .
-            return
+        jobs = self.__args.jobs
+        if jobs <= 0:
+            import multiprocessing
+            jobs = multiprocessing.cpu_count()
+        jobs = min(jobs, len(file_paths))
+
+        units = self._make_units(file_paths)
+        self._partners = dict(
+            [(unit[1], unit[0]) for unit in units if len(unit) > 1])
+        self._paired_headers = set(self._partners.values())
+        # Files of a unit are reported together
+        file_paths = list(itertools.chain.from_iterable(units))
+
+        if self.__args.connect is not None:
+            import socket
+            from ncstyler.server import Client, ServerError
+
+            client = Client(self.__args.connect)
+            try:
+                # Server does not profile, there are no statistics
+                results = ((exit_code, diagnostics, None)
+                    for exit_code, diagnostics in six.moves.map(
+                        functools.partial(self._check_by_server, client),
+                        file_paths))
+                return self._report_results(file_paths, results)
+            except (socket.error, ServerError) as e:
+                print("Failed to check by server : %s" % e)
+                return 1
+            finally:
+                client.close()
+
+        if self.__args.prefetch > 0:
+            return self._check_pipelined(file_paths, units, jobs)
 
-        matched = re.match(self._get_config(name_re)["re"], cpp_object_name)
-        if matched is None:
-            filename = os.path.basename(self.__args.file_path)
-            error_message = self._get_config(name_re)["error"]
-            if len(error_message) > 0:
-                error_message = "%s %s" % (
-                    ' '.join([rule_name.capitalize() for rule_name in name_re.split("_")]),
-                    error_message)
-
-            if self.__args.debug:
-                traceback.print_stack()
-
-            raise SyntaxError("%s:%s:error: Name '%s' isn't matched with rule : %s! %s" % (
-                filename,
-                cpp_object["line_number"],
-                cpp_object_name,
-                name_re,
-                error_message))
-
-    def _get_class_realname(self, class_name):
-        return re.match(r"(\w+).*", class_name).group(1)
-
-    def _validate_cpp_object(self, cpp_object):
-        cpp_object_type = type(cpp_object)
-
-        if cpp_object_type == CppDefine:
-            if len(cpp_object["parameters"]) <= 0:
-                # Normal Define Name
-                self._validate_name(cpp_object, "define")
-            else:
-                # Function Liked Define Name
-                self._validate_name(cpp_object, "define_function")
-                for aparameter in cpp_object["parameters"]:
-                    self._validate_name(aparameter, "define_function_argument")
-        elif cpp_object_type == CppHeaderParser.CppClass:
-            if "struct" in cpp_object["declaration_method"]:
-                class_re = "struct"
-                class_method_re = "struct_method"
-                class_method_argument_re = "struct_method_argument"
-                class_variant_re = "struct_variant"
-            else:
-                class_re = "class"
-                class_method_re = "class_method"
-                class_method_argument_re = "class_method_argument"
-                class_variant_re = "class_variant"
-            self._validate_name(cpp_object, class_re)
-
-            for amethod in cpp_object.get_all_methods():
-                matched = re.match(r".*typedef\W[^\(]*\([^\)]*\W(\w+)\W.*\).*", amethod["debug"])
-                if matched is None:
-                    self._validate_codes_of_cpp_method(amethod)
-                    if not self._is_special_method(amethod):
-                        if ((amethod["name"] != self._get_class_realname(cpp_object["name"]))
-                            and (not amethod.get("constructor", False))
-                            and (not amethod.get("destructor", False))):
-                            try:
-                                self._validate_name(amethod, class_method_re)
-                            except SyntaxError:
-                                is_need_reraise = True
-                                try:
-                                    self._validate_name(amethod, "define_function")
-                                    is_need_reraise = False
-                                except SyntaxError:
-                                    pass
-
-                                if is_need_reraise:
-                                    raise
-
-                    for aparameter in amethod["parameters"]:
-                        an_object = dict()
-                        an_object["line_number"] = aparameter["line_number"]
-                        if (aparameter["type"].endswith("::*")
-                            and (")" in aparameter["name"])):
-                            an_object["name"] = re.match(r"(\w+).*", aparameter["name"]).group(1)
-                            try:
-                                self._validate_name(an_object,
-                                                    class_method_re)
-                            except SyntaxError:
-                                is_need_reraise = True
-                                try:
-                                    self._validate_name(amethod, "define_function")
-                                    is_need_reraise = False
-                                except SyntaxError:
-                                    pass
-
-                                if is_need_reraise:
-                                    raise
-                        else:
-                            an_object["name"] = self._get_argument_name(aparameter)
-                            self._validate_name(an_object,
-                                                class_method_argument_re)
-                else:
-                    self._validate_name(
-                        {"name":matched.group(1), "line_number":amethod["line_number"]},
-                        "typedef")
-
-            for access_specifier in CppHeaderParser.supportedAccessSpecifier:
-                for amember in cpp_object["properties"][access_specifier]:
-                    is_skip_validate = False
-                    if ("type" in amember) and (amember["type"] is not None):
-                        internal_predeclares = ["class", "struct", "union"]
-                        if amember["type"] in internal_predeclares:
-                            is_skip_validate = True
-
-                    if not is_skip_validate:
-                        if amember["static"]:
-                            self._validate_name(amember, "static_variant")
-                        else:
-                            self._validate_name(amember, class_variant_re)
-
-                for amember in cpp_object["structs"][access_specifier]:
-                    self._validate_cpp_object(amember)
-
-                for amember in cpp_object["enums"][access_specifier]:
-                    self._validate_cpp_object(amember)
-
-        elif cpp_object_type == CppHeaderParser.CppStruct:
-            self._validate_name(cpp_object, "struct")
-
-        elif cpp_object_type == CppHeaderParser.CppEnum:
-            self._validate_name(cpp_object, "enum")
-
-            line_number = -1
-            if "line_number" in cpp_object:
-                line_number = cpp_object["line_number"]
-
-            for amember in cpp_object["values"]:
-                # Use parent line number if enum value does not have it's line
-                # number
-                if "line_number" not in amember:
-                    amember["line_number"] = line_number
-                self._validate_name(amember, "enum_value")
-
-        elif cpp_object_type == CppHeaderParser.CppVariable:
-            if cpp_object["type"] != "return":
-                if cpp_object["static"]:
-                    self._validate_name(cpp_object, "static_variant")
-                elif cpp_object["type"] not in ["class", "struct", "union"]:
-                    if not cpp_object["type"].endswith("::"):
-                        # Don't parse variable that implemented outside of
-                        # template class. It's already be parsed when parsing
-                        # the class.
-                        self._validate_name(cpp_object, "global_variant")
-
-        elif cpp_object_type == CppHeaderParser.CppMethod:
-            # Exclude "main" function while parsing global function
-            while True:
-                # FIXME: Parse special case : "struct RArraySize <T ( & ) [ N ]> {"
-                if "debug" in cpp_object:
-                    if re.match(r".*\>\s*{$", cpp_object["debug"]) is not None:
-                        break
-
-                self._validate_codes_of_cpp_method(cpp_object)
-                if cpp_object["name"] == "main":
-                    break
-
-                if self._is_special_method(cpp_object):
-                    break
-
-                if (cpp_object["class"] is None) or (len(cpp_object["class"]) <= 0):
-                    if ">" in cpp_object["name"]:
-                        regex = r"^[^<:]*?(?:(\w+)::)?(\w+)\s*<"
-                        matched = re.search(regex, cpp_object["debug"])
-                        if matched.group(1) is not None:
-                            cpp_object["class"] = matched.group(1)
-
-                        cpp_object["name"] = matched.group(2)
-                        self._validate_name(cpp_object, "class_method")
-                    elif len(cpp_object["returns"]) > 0:
-                        # If a function does not have return value(at least
-                        # "void"), it maybe macro invokes.
-
-                        # FIXME: We just ignored this situation:
-                        # Code Snippets: static RSignal<void(int)> sReceived;
-                        if "<" not in cpp_object["name"]:
-                            self._validate_name(cpp_object, "function")
-
-                    break
-
-                if self._get_class_realname(cpp_object["class"]) == cpp_object["name"]:
-                    # Constructor / Destructor will the same with class name
-                    break
-
-                self._validate_name(cpp_object, "class_method")
-                break
-
-        elif cpp_object_type == CppHeaderParser.CppUnion:
-            self._validate_name(cpp_object, "union")
-
-        elif cpp_object_type == CppNamespace:
-            self._validate_name(cpp_object, "namespace")
-
-        elif cpp_object_type == CppFileName:
-            self._validate_name(cpp_object, "filename")
+        try:
+            if jobs <= 1:
+                self._apply_memory_limit()
+                results = itertools.chain.from_iterable(
+                    six.moves.map(self._check_unit_for_report, units))
+                return self._report_results(file_paths, results)
+
+            import multiprocessing
+            pool = multiprocessing.Pool(
+                jobs, initializer=_init_worker, initargs=(self,))
+            try:
+                # Small chunks keep workers busy when file sizes vary a lot
+                chunk_size = max(1, min(16, len(units) // (jobs * 4)))
+                if self.__args.compdb is not None:
+                    # Keep the largest first order
+                    chunk_size = 1
+                results = itertools.chain.from_iterable(
+                    pool.imap(_check_unit_in_worker, units, chunk_size))
+                return self._report_results(file_paths, results)
+            finally:
+                pool.terminate()
+                pool.join()
+        finally:
+            if self._cache is not None:
+                self._cache.prune()
+
+    def _check_by_server(self, client, file_path):
+        """Check a file by the server, the staged content is sent with
+        --staged, the server reads the working tree file
+        """
+        if not self.__args.staged:
+            return client.check_file(file_path)
 
-    def exec_(self):
         try:
+            with self._open_source(file_path) as content:
+                source = decode_source(content)
+        except (IOError, OSError) as e:
+            return 1, [Diagnostic(file_path, message=str(e))]
+        return client.check_file(file_path, source)
+
+    def _check_pipelined(self, file_paths, units, jobs):
+        """Read files ahead by threads while the processes check the ones
+        already read, results reported in order
+        """
+        from ncstyler.pipeline import Prefetcher
+
+        prefetcher = Prefetcher(units, self._read_unit, self.__args.prefetch)
+
+        def release_results(unit_results):
+            for results in unit_results:
+                # Contents of a unit are freed once it's reported
+                prefetcher.release()
+                for result in results:
+                    yield result
+
+        pool = None
+        try:
+            if jobs <= 1:
+                self._apply_memory_limit()
+                unit_results = six.moves.map(
+                    self._check_prefetched_for_report, prefetcher)
+            else:
+                import multiprocessing
+                pool = multiprocessing.Pool(
+                    jobs, initializer=_init_worker, initargs=(self,))
+                unit_results = pool.imap(
+                    _check_prefetched_in_worker, prefetcher, 1)
+
+            return self._report_results(
+                file_paths, release_results(unit_results))
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+            if self._cache is not None:
+                self._cache.prune()
+
+    def _report_results(self, file_paths, results):
+        run_stats = None
+        if self.__is_profiling:
+            run_stats = RunStats()
 
-            with open(self.__args.file_path, "r") as source_file:
-                # For later parse by _validate_codes_of_cpp_method()
-                self._source_lines = source_file.readlines()
-
-            parsed_info = CppHeaderParser.CppHeader(self.__args.file_path)
-
-            # Verify File Names
-            filename = os.path.basename(self.__args.file_path)
-            cpp_object = CppFileName()
-            cpp_object["name"] = filename
-            self._validate_cpp_object(cpp_object)
-
-            # Verify Define Names
-            for define_text in parsed_info.defines:
-                self._validate_cpp_object(self.parse_define(define_text))
-
-            # Verify Function Names
-            for cpp_object in parsed_info.functions:
-                self._validate_cpp_object(cpp_object)
-
-            # Verify Class Names
-            for cpp_object in parsed_info.classes_order:
-                self._validate_cpp_object(cpp_object)
-
-            # Verify Struct Names
-            for cpp_object in parsed_info.structs_order:
-                self._validate_cpp_object(cpp_object)
-
-            # Verify Enum Names
-            for cpp_object in parsed_info.enums:
-                self._validate_cpp_object(cpp_object)
-
-            # Verify Variable Names
-            for cpp_object in parsed_info.variables:
-                # Avoid checking member variable inside function body.
-                if '{' not in cpp_object['type']:
-                    self._validate_cpp_object(cpp_object)
-
-            for namespace in parsed_info.namespaces:
-                cpp_object = CppNamespace()
-                cpp_object["name"] = namespace
-                self._validate_cpp_object(cpp_object)
-
-            # Verify Typdef Names
-            for cpp_object in parsed_info.typedefs:
-                self._validate_cpp_object(cpp_object)
-        except SyntaxError as e:
-            print(str(e))
-            return 1
-        except CppHeaderParser.CppHeaderParser.CppParseError as e:
-            # CppHeaderParser can't parse this file, but we should pass it, this
-            # is the CppHeaderParser's problem.
-            print(str(e))
-            return 0
-        return 0
+        if self.__args.output is None:
+            stream = sys.stdout
+        else:
+            stream = open(self.__args.output, "w")
+
+        try:
+            formatter = create_formatter(self.__args.format, stream)
+            formatter.begin()
+            exit_code = self._report_diagnostics(
+                file_paths, results, formatter, run_stats)
+            formatter.end()
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+        if run_stats is not None:
+            self._report_stats(run_stats)
+
+        return exit_code
+
+    def _report_diagnostics(self, file_paths, results, formatter, run_stats):
+        exit_code = 0
+        for file_path, result in zip(file_paths, results):
+            file_exit_code, diagnostics, file_stats = result
+            if file_stats is not None:
+                run_stats.add(file_stats)
+
+            file_exit_code, diagnostics = self._filter_reported(
+                file_path, file_exit_code, diagnostics)
+            if self._fixer is not None:
+                file_exit_code, diagnostics = self._fix_file(
+                    file_path, file_exit_code, diagnostics, formatter.stream)
+            formatter.add_file(file_path, diagnostics)
+            exit_code = max(exit_code, file_exit_code)
+
+        if self._new_baseline is not None:
+            self._new_baseline.save(self.__args.write_baseline)
+            sys.stderr.write("Recorded %s violations to %s\n" % (
+                self._new_baseline.count(), self.__args.write_baseline))
+
+        return exit_code
+
+    def _fix_file(self, file_path, exit_code, diagnostics, stream):
+        """Rename the violating names of the file, return the exit code and
+        diagnostics to report. With --diff the diff is written to stream
+        and nothing is reported, exit code still tells if there were
+        violations.
+        """
+        # Header of a unit is reported before it's implementation file
+        partner = self._header_fixes.pop(
+            self._partners.get(file_path, None), None)
+        is_paired = file_path in self._paired_headers
+        try:
+            file_fix = self._fixer.fix_file(
+                file_path, diagnostics, self.__args.diff, partner, is_paired)
+        except (IOError, OSError) as e:
+            return 1, diagnostics + [Diagnostic(file_path, message=str(e))]
+
+        if is_paired:
+            self._header_fixes[file_path] = file_fix
+
+        renames = file_fix.renames
+        if self.__args.diff:
+            stream.write(file_fix.diff)
+            return exit_code, [d for d in diagnostics if d.rule is None]
+
+        if len(renames) <= 0:
+            return exit_code, diagnostics
+
+        sys.stderr.write("%s: renamed %s\n" % (file_path, ", ".join(
+            ["%s -> %s" % (name, renames[name]) for name in sorted(renames)])))
+        diagnostics = [d for d in diagnostics if d.name not in renames]
+        errors = [d for d in diagnostics if d.severity == "error"]
+        return (1 if len(errors) > 0 else 0), diagnostics
+
+    def _filter_reported(self, file_path, exit_code, diagnostics):
+        """Drop the diagnostics should not be reported, return the exit code
+        and diagnostics left
+        """
+        count = len(diagnostics)
+        if self.__changed_files is not None:
+            diagnostics = self._filter_unchanged(file_path, diagnostics)
+
+        if self._new_baseline is not None:
+            # Recorded, not reported, parse errors and the like still are
+            self._new_baseline.add(file_path, diagnostics)
+            diagnostics = [d for d in diagnostics if d.rule is None]
+        elif self._baseline is not None:
+            diagnostics = self._baseline.filter(file_path, diagnostics)
+
+        if (exit_code != 0) and (len(diagnostics) < count):
+            errors = [d for d in diagnostics if d.severity == "error"]
+            exit_code = 1 if len(errors) > 0 else 0
+
+        return exit_code, diagnostics
+
+    def _report_stats(self, run_stats):
+        if self.__args.profile:
+            sys.stderr.write(run_stats.format_text() + "\n")
+
+        if self.__args.stats is not None:
+            with open(self.__args.stats, "w") as stats_file:
+                json.dump(run_stats.to_dict(), stats_file, indent=2,
+                          sort_keys=True)
+
+# Application instance of current worker process, setup by _init_worker()
+_worker_application = None
+
+def _init_worker(application):
+    global _worker_application
+    _worker_application = application
+    application._apply_memory_limit()
+
+def _check_unit_in_worker(unit):
+    return _worker_application._check_unit_for_report(unit)
+
+def _check_prefetched_in_worker(prefetched):
+    return _worker_application._check_prefetched_for_report(prefetched)
+
+def _find_partner(file_path, is_checked):
+    """Path of the header or implementation file of the same name in the same
+    directory as file_path, which is_checked(), or None
+    """
+    base_path, suffix = os.path.splitext(file_path)
+    suffix = suffix.lower()
+    if suffix in HEADER_FILE_SUFFIXES:
+        partner_suffixes = IMPLEMENTATION_FILE_SUFFIXES
+    elif suffix in IMPLEMENTATION_FILE_SUFFIXES:
+        partner_suffixes = HEADER_FILE_SUFFIXES
+    else:
+        return None
+
+    for partner_suffix in partner_suffixes:
+        partner = base_path + partner_suffix
+        if is_checked(partner):
+            return partner
+
+    return None
 
 def main():
     a = Application()
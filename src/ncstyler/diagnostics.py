@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+
+import os.path
+
+class Diagnostic(object):
+    """A problem found in a source file.
+
+    Name violations carry the rule and the name, other problems (parse
+    errors, unreadable files) only carry a message.
+    """
+
+    __slots__ = ("file_path", "line_number", "severity", "rule", "name",
+                 "message", "column")
+
+    def __init__(self, file_path, line_number=-1, severity="error",
+                 rule=None, name=None, message="", column=-1):
+        self.file_path = file_path
+        self.line_number = line_number
+        self.column = column
+        self.severity = severity
+        self.rule = rule
+        self.name = name
+        self.message = message
+
+    def __str__(self):
+        if self.rule is None:
+            return self.message
+
+        return "%s:%s:%s: %s" % (
+            os.path.basename(self.file_path),
+            self.line_number,
+            self.severity,
+            self.format_message())
+
+    def format_message(self):
+        """Description without the location"""
+        if self.rule is None:
+            return self.message
+
+        return "Name '%s' isn't matched with rule : %s! %s" % (
+            self.name, self.rule, self.message)
+
+    def __repr__(self):
+        return "Diagnostic(%r)" % str(self)
+
+    def to_dict(self):
+        return dict((key, getattr(self, key)) for key in self.__slots__)
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(**values)
+
+    @classmethod
+    def from_exception(cls, file_path, error):
+        """Error of a file failed to check by an unexpected exception"""
+        return cls(file_path, message="Failed to check %s : %s: %s" % (
+            file_path, type(error).__name__, error))
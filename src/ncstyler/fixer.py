@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+
+import os
+import re
+import codecs
+import difflib
+
+# Cases a fix transform could convert names to
+CASES = ("snake", "upper_snake", "camel", "pascal")
+
+# Words of a name: "getHTTPResponse2" -> get, HTTP, Response2
+_WORD_RE = re.compile(r"[A-Z]+(?![a-z])\d*|[A-Z]?[a-z]+\d*|\d+")
+
+# Names to rename. Comments, literals and directives naming files or
+# messages (#include <Total/Helper.h>) are matched as a whole and kept.
+_REWRITE_RE = re.compile(r"""
+    //[^\n]*
+    |/\*.*?(?:\*/|\Z)
+    |"(?:\\.|[^"\\\n])*"
+    |(?<![\w'])'(?:\\.|[^'\\\n])*'
+    |^[ \t]*\#[ \t]*(?:include|include_next|import|pragma|error|warning|line)
+        \b(?:\\\n|[^\n])*
+    |(?P<name>[A-Za-z_]\w*)
+    """, re.DOTALL | re.MULTILINE | re.VERBOSE)
+
+# What precedes a name: member access, or "qualifier::" (qualifier may be
+# empty for "::name", template arguments are skipped)
+_ACCESSOR_RE = re.compile(
+    r"(?:\b(this)\s*->|(\.|->)|(\w*)\s*(?:<[^<>;{}]*>)?\s*::)\s*\Z")
+
+# Look back this far for the accessor of a name
+_ACCESSOR_LOOKBACK = 96
+
+# A type before a name declares it: "int Name", "foo_t *Name", "map<> Name"
+_DECLARATOR_RE = re.compile(r"(?:\b(\w+)|>)[\s*&]*\Z")
+
+# Words before a name not being a type of it
+_NOT_TYPES = frozenset([
+    "return", "else", "case", "goto", "throw", "delete", "new", "do",
+    "sizeof", "and", "or", "not", "co_return", "co_yield", "co_await",
+])
+
+# Kinds declared in lists without a type, "enum { Name, ... }" and macro
+# parameters, their violations are found at the declarations
+_LISTED_KINDS = frozenset(["enum_value", "define_function_argument"])
+
+_CLASS_RE = re.compile(r"\b(?:class|struct|union)\s+(\w+)[^;{}()]*\{")
+
+# Braces of code, comments and literals are matched to be skipped
+_BRACE_RE = re.compile(r"""
+    //[^\n]*
+    |/\*.*?(?:\*/|\Z)
+    |"(?:\\.|[^"\\\n])*"
+    |(?<![\w'])'(?:\\.|[^'\\\n])*'
+    |(?P<brace>[{}])
+    """, re.DOTALL | re.VERBOSE)
+
+_UNSUPPORTED_BOMS = (codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE,
+                     codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+
+def transform_name(name, fix_config):
+    """Return name converted by a rule's fix transform, or None if there
+    are no words in it.
+
+    fix_config is the "fix" option of a rule, with optional keys "case"
+    (one of CASES), "prefix" and "suffix". An existing prefix is replaced,
+    like "mSize" or "m_Size" to "m_size".
+    """
+    prefix = fix_config.get("prefix", None) or ""
+    suffix = fix_config.get("suffix", None) or ""
+    core = name.strip("_")
+    if (len(prefix) > 0) and core.startswith(prefix):
+        core = core[len(prefix):]
+    if (len(suffix) > 0) and core.endswith(suffix):
+        core = core[:-len(suffix)]
+
+    words = _WORD_RE.findall(core)
+    if (len(words) > 1) and (words[0].lower() == prefix.strip("_").lower()):
+        # Prefix without the separator, like "g" of "gValue"
+        words = words[1:]
+    if len(words) <= 0:
+        return None
+
+    case = fix_config.get("case", None)
+    if case is None:
+        pass
+    elif case == "snake":
+        core = "_".join([w.lower() for w in words])
+    elif case == "upper_snake":
+        core = "_".join([w.upper() for w in words])
+    elif case == "camel":
+        core = words[0].lower() + "".join([w.capitalize() for w in words[1:]])
+    elif case == "pascal":
+        core = "".join([w.capitalize() for w in words])
+    else:
+        raise ValueError("Unknown case '%s', must be one of : %s" % (
+            case, ", ".join(CASES)))
+
+    return prefix + core + suffix
+
+def _get_encoding(content):
+    """Encoding to write the fixed content back in, None if not supported"""
+    if content.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+
+    for bom in _UNSUPPORTED_BOMS:
+        if content.startswith(bom):
+            return None
+
+    try:
+        content.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+def _iter_names(text):
+    """Yield (match, qualifier) of names in code of text, qualifier is None
+    for a bare name, "this" for "this->name", "." for other member
+    accesses, or the name before "::"
+    """
+    for matched in _REWRITE_RE.finditer(text):
+        if matched.group("name") is None:
+            continue
+
+        start = matched.start()
+        accessor = _ACCESSOR_RE.search(
+            text, max(0, start - _ACCESSOR_LOOKBACK), start)
+        if accessor is None:
+            yield matched, None
+        elif accessor.group(1) is not None:
+            yield matched, "this"
+        elif accessor.group(2) is not None:
+            yield matched, "."
+        else:
+            yield matched, accessor.group(3)
+
+def _get_declared_names(text, names=None):
+    """Return names (all if None) having a type before them in code of text"""
+    declared_names = set()
+    for matched, qualifier in _iter_names(text):
+        name = matched.group("name")
+        if (qualifier is not None) or (name in declared_names):
+            continue
+        if (names is not None) and (name not in names):
+            continue
+
+        start = matched.start()
+        declarator = _DECLARATOR_RE.search(
+            text, max(0, start - _ACCESSOR_LOOKBACK), start)
+        if (declarator is not None) and (declarator.group(1) not in _NOT_TYPES):
+            declared_names.add(name)
+
+    return declared_names
+
+def _get_class_members(text):
+    """Return {class name: names declared in the body of it} of text"""
+    members = dict()
+    for matched in _CLASS_RE.finditer(text):
+        depth = 1
+        end = len(text)
+        for abrace in _BRACE_RE.finditer(text, matched.end()):
+            brace = abrace.group("brace")
+            if brace is None:
+                continue
+            depth += 1 if brace == "{" else -1
+            if depth <= 0:
+                end = abrace.start()
+                break
+
+        names = members.setdefault(matched.group(1), set())
+        names.update([name.group("name") for name, qualifier
+            in _iter_names(text[matched.end():end]) if qualifier is None])
+
+    return members
+
+class FileFix(object):
+    """Renames of a file, and what it's implementation file needs to apply
+    them too
+    """
+
+    __slots__ = ("renames", "class_members", "declared_names", "diff")
+
+    def __init__(self, renames, class_members, declared_names=None, diff=""):
+        self.renames = renames
+        # Names declared in the file, the implementation file must not
+        # rename them alone
+        self.declared_names = declared_names or set()
+        # Classes declared in the file and names declared in them, renamed
+        # after "class_name::" and "this->" too
+        self.class_members = class_members
+        # Unified diff of the change
+        self.diff = diff
+
+class Fixer(object):
+    """Renames violating names of a file by the fix transforms of their rules.
+
+    Only names declared in the file are renamed, that is names with a type
+    before them ("int Name"), or enum values and macro parameters. Names
+    only assigned ("Name = 1") are declared elsewhere. All their
+    occurrences in the file are renamed to the same new name, except in
+    comments, literals, #include like directives, member accesses, and
+    after "qualifier::" unless qualifier is a class of the file declaring
+    the name. Renamed in one pass and one write. Names used by other files
+    are not renamed there (but see the partner of fix_file()), so
+    transforms are best configured for rules of file local names.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        # Reject wrong transforms before any file is touched
+        for rule_name in rules.names():
+            fix_config = rules[rule_name].fix
+            if fix_config is not None:
+                transform_name("x", fix_config)
+
+    def get_renames(self, text, diagnostics):
+        """Return {old name: new name} for the violations in diagnostics"""
+        renames = dict()
+        conflicts = set()
+        listed_names = set()
+        for adiagnostic in diagnostics:
+            if adiagnostic.rule in (None, "filename"):
+                continue
+
+            rule = self.rules[adiagnostic.rule]
+            if rule.fix is None:
+                continue
+
+            new_name = transform_name(adiagnostic.name, rule.fix)
+            if (new_name is None) or (new_name == adiagnostic.name):
+                continue
+            if rule.fullmatch(new_name) is None:
+                # Transform can't satisfy the rule, leave it to the user
+                continue
+
+            if renames.get(adiagnostic.name, new_name) != new_name:
+                # Violates several rules wanting different names
+                conflicts.add(adiagnostic.name)
+            renames[adiagnostic.name] = new_name
+            if adiagnostic.rule in _LISTED_KINDS:
+                listed_names.add(adiagnostic.name)
+
+        for name in conflicts:
+            del renames[name]
+
+        used_names = set([matched.group("name")
+            for matched, qualifier in _iter_names(text)])
+        declared_names = listed_names | _get_declared_names(
+            text, set(renames.keys()))
+
+        # Never merge two names into one, or into a name already used, and
+        # leave names declared elsewhere ("Height = v", "w->Width = 0") alone
+        new_names = list(renames.values())
+        for name, new_name in list(renames.items()):
+            if ((new_name in used_names) or (new_names.count(new_name) > 1)
+                or (name not in declared_names)):
+                del renames[name]
+
+        return renames
+
+    def rewrite(self, text, renames, class_members):
+        """Return text with renames applied to the bare names, and to the
+        names qualified by a class of class_members declaring them
+        """
+        member_names = set()
+        for names in class_members.values():
+            member_names |= names
+
+        parts = []
+        last_pos = 0
+        for matched, qualifier in _iter_names(text):
+            name = matched.group("name")
+            if name not in renames:
+                continue
+            if qualifier == "this":
+                if name not in member_names:
+                    continue
+            elif (qualifier is not None) and (
+                    name not in class_members.get(qualifier, ())):
+                continue
+
+            parts.append(text[last_pos:matched.start()])
+            parts.append(renames[name])
+            last_pos = matched.end()
+
+        parts.append(text[last_pos:])
+        return "".join(parts)
+
+    def fix_file(self, file_path, diagnostics, is_dry_run=False,
+                 partner=None, is_paired=False):
+        """Rename the violating names of a file, return the FileFix. File is
+        not written if is_dry_run.
+
+        partner is the FileFix of the header if file_path is it's
+        implementation file, it's renames are applied here too, so out of
+        line definitions follow their declarations, and names it declares
+        but keeps are kept. is_paired tells file_path is such a header.
+        """
+        with open(file_path, "rb") as source_file:
+            content = source_file.read()
+
+        encoding = _get_encoding(content)
+        if encoding is None:
+            return FileFix(dict(), dict())
+
+        text = content.decode(encoding)
+        renames = self.get_renames(text, diagnostics)
+        class_members = _get_class_members(text)
+        declared_names = set()
+        if is_paired:
+            declared_names = _get_declared_names(text)
+        if partner is not None:
+            # Names of the header win, the ones it keeps are kept here too
+            for name in list(renames.keys()):
+                if name in partner.declared_names:
+                    del renames[name]
+            renames.update(partner.renames)
+            for class_name, names in partner.class_members.items():
+                class_members.setdefault(class_name, set()).update(names)
+
+        if len(renames) <= 0:
+            return FileFix(renames, class_members, declared_names)
+
+        fixed_text = self.rewrite(text, renames, class_members)
+        diff_path = file_path
+        if not os.path.isabs(diff_path):
+            diff_path = os.path.normpath(diff_path)
+        diff_path = diff_path.replace(os.sep, "/").lstrip("/")
+        diff = "".join(difflib.unified_diff(
+            text.splitlines(True), fixed_text.splitlines(True),
+            "a/%s" % diff_path, "b/%s" % diff_path))
+
+        if not is_dry_run:
+            # Opened in binary, line endings are kept as they are
+            with open(file_path, "wb") as source_file:
+                source_file.write(fixed_text.encode(encoding))
+
+        return FileFix(renames, class_members, declared_names, diff)
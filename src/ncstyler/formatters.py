@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+
+import json
+import os.path
+import ncstyler
+
+# Output formats of diagnostics:
+#   text  : The classic "file:line:severity: message" lines
+#   gcc   : "path:line:column: severity: message [rule]", understood by
+#           editors and CI problem matchers
+#   jsonl : One JSON object per diagnostic
+#   sarif : SARIF 2.1.0 log
+#   junit : JUnit XML, a test case per file
+FORMATS = ("text", "gcc", "jsonl", "sarif", "junit")
+
+_SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+def _escape_xml(text):
+    # xml.sax.saxutils imports urllib, too slow to import for this
+    return (text.replace("&", "&amp;").replace("<", "&lt;")
+            .replace(">", "&gt;").replace('"', "&quot;"))
+
+class Formatter(object):
+    """Writes diagnostics to a stream as soon as each file is checked.
+
+    begin() and end() write the head and tail of the whole report, the
+    stream is flushed after every file, so consumers could read the report
+    while a large tree is still being checked.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def begin(self):
+        pass
+
+    def add_file(self, file_path, diagnostics):
+        self._write_file(file_path, diagnostics)
+        self.stream.flush()
+
+    def _write_file(self, file_path, diagnostics):
+        raise NotImplementedError()
+
+    def end(self):
+        self.stream.flush()
+
+class TextFormatter(Formatter):
+    def _write_file(self, file_path, diagnostics):
+        for adiagnostic in diagnostics:
+            self.stream.write("%s\n" % adiagnostic)
+
+class GccFormatter(Formatter):
+    def _write_file(self, file_path, diagnostics):
+        for adiagnostic in diagnostics:
+            location = adiagnostic.file_path
+            if adiagnostic.line_number > 0:
+                location += ":%s" % adiagnostic.line_number
+                if adiagnostic.column > 0:
+                    location += ":%s" % adiagnostic.column
+
+            aline = "%s: %s: %s" % (location, adiagnostic.severity,
+                                    adiagnostic.format_message().strip())
+            if adiagnostic.rule is not None:
+                aline += " [%s]" % adiagnostic.rule
+            self.stream.write(aline + "\n")
+
+class JsonLinesFormatter(Formatter):
+    def _write_file(self, file_path, diagnostics):
+        for adiagnostic in diagnostics:
+            self.stream.write(json.dumps(adiagnostic.to_dict(),
+                                         sort_keys=True) + "\n")
+
+class SarifFormatter(Formatter):
+    def __init__(self, stream):
+        super(SarifFormatter, self).__init__(stream)
+        self._is_first_result = True
+
+    def begin(self):
+        # Results are streamed into the list, the rest of the document is
+        # written around them
+        tool = {"driver": {
+            "name": "ncstyler",
+            "version": ncstyler.__version__,
+        }}
+        self.stream.write(
+            '{"$schema": %s, "version": "2.1.0", "runs": [{"tool": %s, '
+            '"results": [\n' % (json.dumps(_SARIF_SCHEMA),
+                                json.dumps(tool, sort_keys=True)))
+
+    def _write_file(self, file_path, diagnostics):
+        for adiagnostic in diagnostics:
+            region = dict()
+            if adiagnostic.line_number > 0:
+                region["startLine"] = adiagnostic.line_number
+                if adiagnostic.column > 0:
+                    region["startColumn"] = adiagnostic.column
+
+            location = {"artifactLocation": {
+                "uri": adiagnostic.file_path.replace(os.sep, "/")}}
+            if len(region) > 0:
+                location["region"] = region
+
+            result = {
+                "level": adiagnostic.severity,
+                "message": {"text": adiagnostic.format_message().strip()},
+                "locations": [{"physicalLocation": location}],
+            }
+            if adiagnostic.rule is not None:
+                result["ruleId"] = adiagnostic.rule
+
+            if not self._is_first_result:
+                self.stream.write(",\n")
+            self._is_first_result = False
+            self.stream.write(json.dumps(result, sort_keys=True))
+
+    def end(self):
+        self.stream.write("\n]}]}\n")
+        self.stream.flush()
+
+class JUnitFormatter(Formatter):
+    def begin(self):
+        self.stream.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        self.stream.write('<testsuites>\n<testsuite name="ncstyler">\n')
+
+    def _write_file(self, file_path, diagnostics):
+        errors = [d for d in diagnostics if d.severity == "error"]
+        others = [d for d in diagnostics if d.severity != "error"]
+
+        self.stream.write('<testcase classname="ncstyler" name="%s">' % (
+            _escape_xml(file_path)))
+        if len(errors) > 0:
+            # Only one failure allowed in a test case
+            self.stream.write('<failure message="%s naming violations">%s'
+                '</failure>' % (len(errors), _escape_xml(
+                    "\n".join([str(d) for d in errors]))))
+        elif len(others) > 0:
+            # Could not be checked, like parse errors
+            self.stream.write('<skipped message="%s"/>' % _escape_xml(
+                "\n".join([d.format_message() for d in others])))
+        self.stream.write('</testcase>\n')
+
+    def end(self):
+        self.stream.write('</testsuite>\n</testsuites>\n')
+        self.stream.flush()
+
+_FORMATTERS = {
+    "text": TextFormatter,
+    "gcc": GccFormatter,
+    "jsonl": JsonLinesFormatter,
+    "sarif": SarifFormatter,
+    "junit": JUnitFormatter,
+}
+
+def create_formatter(format_name, stream):
+    return _FORMATTERS[format_name](stream)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+
+import re
+import codecs
+import os.path
+import bisect
+import subprocess
+
+_HUNK_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+class GitError(Exception):
+    pass
+
+class ChangedFile(object):
+    """Lines of a file touched by the change"""
+
+    def __init__(self, path, is_new=False):
+        self.path = path
+        self.is_new = is_new
+        # Sorted, non overlapped (first line, last line) pairs
+        self.ranges = []
+
+    def add_range(self, first_line, line_count):
+        if line_count > 0:
+            self.ranges.append((first_line, first_line + line_count - 1))
+
+    def contains_line(self, line_number):
+        if self.is_new:
+            return True
+
+        index = bisect.bisect_right(self.ranges, (line_number, float("inf")))
+        if index <= 0:
+            return False
+
+        return line_number <= self.ranges[index - 1][1]
+
+def _run_git_raw(arguments, cwd=None):
+    process = subprocess.Popen(
+        ["git"] + arguments, cwd=cwd,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    output, error_output = process.communicate()
+    if process.returncode != 0:
+        raise GitError(error_output.decode("utf-8", "replace").strip())
+
+    return output
+
+def _run_git(arguments, cwd=None):
+    return _run_git_raw(arguments, cwd).decode("utf-8", "replace")
+
+def _unquote_path(path):
+    """Path git quoted C style for special characters in it"""
+    if not (path.startswith('"') and path.endswith('"')):
+        return path
+
+    path = codecs.escape_decode(path[1:-1].encode("utf-8"))[0]
+    return path.decode("utf-8", "replace")
+
+def read_staged_file(file_path):
+    """Return content of file_path in the index as bytes"""
+    directory, file_name = os.path.split(os.path.abspath(file_path))
+    return _run_git_raw(["cat-file", "blob", ":./%s" % file_name], directory)
+
+def get_changed_files(since=None, staged=False, cwd=None):
+    """Collect changed files of the git repository contains cwd.
+
+    Compares the working tree (or the index if staged) with since, or with
+    the index (HEAD if staged) when since is None. Return a dict of absolute
+    path -> ChangedFile, deleted files are not included.
+    """
+    top_dir = _run_git(["rev-parse", "--show-toplevel"], cwd).strip()
+
+    arguments = ["-c", "core.quotePath=false", "diff", "-U0", "--no-color",
+                 "--no-ext-diff", "--no-renames", "--diff-filter=AM"]
+    if staged:
+        arguments.append("--cached")
+    if since is not None:
+        arguments.append(since)
+    arguments.append("--")
+
+    changed_files = dict()
+    changed_file = None
+    is_new = False
+    # Header of a file ends at it's first hunk, added lines after it like
+    # "++ counter;" look like "+++ " lines
+    is_in_header = False
+    for aline in _run_git(arguments, cwd).splitlines():
+        if aline.startswith("diff --git "):
+            changed_file = None
+            is_new = False
+            is_in_header = True
+        elif aline.startswith("@@"):
+            is_in_header = False
+            matched = _HUNK_RE.match(aline)
+            if (changed_file is None) or (matched is None):
+                continue
+
+            line_count = matched.group(2)
+            if line_count is None:
+                line_count = 1
+            changed_file.add_range(int(matched.group(1)), int(line_count))
+        elif not is_in_header:
+            continue
+        elif aline.startswith("new file mode"):
+            is_new = True
+        elif aline.startswith("+++ "):
+            # Paths with spaces are followed by a tab
+            path = _unquote_path(aline[4:].rstrip("\t"))
+            if path.startswith("b/"):
+                path = path[2:]
+            path = os.path.normpath(os.path.join(top_dir, path))
+            changed_file = ChangedFile(path, is_new)
+            changed_files[path] = changed_file
+
+    return changed_files
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+
+import signal
+import threading
+import contextlib
+
+class FileTimeoutError(Exception):
+    """Raised when checking a file took longer than the time limit"""
+    pass
+
+# Alarm repeats this often after the time limit passed, parsers swallowing
+# FileTimeoutError by bare excepts get it again soon
+_REPEAT_INTERVAL = 0.1
+
+# Set once the time limit of the current block passed
+_is_expired = False
+
+def _on_alarm(signum, frame):
+    global _is_expired
+    _is_expired = True
+    raise FileTimeoutError()
+
+@contextlib.contextmanager
+def time_limit(seconds):
+    """Raise FileTimeoutError inside the block after seconds of wall time.
+
+    Implemented by SIGALRM, so it's a no-op where that's unavailable
+    (Windows) or outside the main thread (server mode), or if seconds <= 0.
+    """
+    if ((seconds <= 0) or (not hasattr(signal, "setitimer"))
+        or (threading.current_thread().name != "MainThread")):
+        yield
+        return
+
+    global _is_expired
+    _is_expired = False
+    previous_handler = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds, _REPEAT_INTERVAL)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+        _is_expired = False
+
+def raise_swallowed(error):
+    """Raise FileTimeoutError or MemoryError again if error was raised
+    because of it, by code catching everything, like CppHeaderParser which
+    turns them into parse errors.
+
+    The time limit passed inside the current time_limit() block, or error
+    was raised while handling one of them (Python 3 only).
+    """
+    if _is_expired:
+        raise FileTimeoutError()
+
+    context = getattr(error, "__context__", None)
+    while context is not None:
+        if isinstance(context, (FileTimeoutError, MemoryError)):
+            raise context
+        context = getattr(context, "__context__", None)
+
+def set_memory_limit(max_bytes):
+    """Limit the address space of current process, allocations beyond it
+    raise MemoryError. Return False if it's not supported on this platform.
+    """
+    try:
+        import resource
+    except ImportError:
+        return False
+
+    hard_limit = resource.getrlimit(resource.RLIMIT_AS)[1]
+    if (hard_limit != resource.RLIM_INFINITY) and (max_bytes > hard_limit):
+        max_bytes = hard_limit
+
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (max_bytes, hard_limit))
+    except (ValueError, OSError):
+        return False
+    return True
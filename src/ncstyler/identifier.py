@@ -0,0 +1,23 @@
+#!/usr/bin/env python
+
+class Identifier(object):
+    """A name to validate.
+
+    kind is the rule the name validated against, line_number and column are
+    -1 if unknown, scope is the name of the class or namespace it belongs to
+    (or None). Slotted since a big file produces hundreds of thousands of
+    them.
+    """
+
+    __slots__ = ("kind", "name", "line_number", "column", "scope")
+
+    def __init__(self, kind, name, line_number=-1, column=-1, scope=None):
+        self.kind = kind
+        self.name = name
+        self.line_number = line_number
+        self.column = column
+        self.scope = scope
+
+    def __repr__(self):
+        return "Identifier(%r, %r, %r, %r, %r)" % (
+            self.kind, self.name, self.line_number, self.column, self.scope)
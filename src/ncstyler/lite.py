@@ -0,0 +1,719 @@
+#!/usr/bin/env python
+
+"""Lightweight front-end, an alternative to CppHeaderParser.
+
+The source is streamed as tokens once and only the identifiers ncstyler
+checks are emitted as Identifier records, no parse tree is built.
+"""
+
+import re
+from ncstyler.scanner import LOCAL_VARIANT_RE
+from ncstyler.identifier import Identifier
+
+# A name violating the rule of it's kind is accepted if it matches the
+# fallback one: methods named like macros are usually macro invokes.
+FALLBACK_KINDS = {
+    "class_method": "define_function",
+    "struct_method": "define_function",
+}
+
+_TOKEN_RE = re.compile(r"""
+    (?P<space>[ \t\r\f\v]+)
+    |(?P<newline>\n)
+    |(?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+    |(?P<preprocessor>\#(?:\\\n|[^\n])*)
+    |(?P<string>(?:u8|[uUL])?R"(?P<delimiter>[^(\s"]*)\(.*?\)(?P=delimiter)"
+        |(?:u8|[uUL])?"(?:\\.|[^"\\\n])*"
+        |[uUL]?'(?:\\.|[^'\\\n])*')
+    |(?P<name>[A-Za-z_]\w*)
+    |(?P<number>\.?\d(?:[eEpP][+-]|[\w.'])*)
+    |(?P<operator>::|->|\.\.\.|.)
+    """, re.DOTALL | re.VERBOSE)
+
+_DEFINE_RE = re.compile(r"#\s*define\s+(\w+)(\(([^\)]*)\))?")
+_MACRO_NAME_RE = re.compile(r"[A-Z_][A-Z0-9_]*$")
+
+_CLASS_KEYS = ("class", "struct", "union")
+_ACCESS_KEYWORDS = ("public", "protected", "private", "signals", "slots",
+                    "Q_SIGNALS", "Q_SLOTS")
+_SKIPPED_STATEMENTS = ("using", "friend", "static_assert", "namespace",
+                       "template", "return", "goto", "asm", "__asm__")
+_SPECIFIERS = ("inline", "static", "virtual", "explicit", "constexpr",
+               "extern", "friend", "__inline", "__forceinline", "mutable",
+               "register", "thread_local", "volatile", "const")
+# Attribute like tokens followed by parenthesized arguments
+_ATTRIBUTES = ("__attribute__", "__declspec", "alignas", "__alignas")
+# Names could not be a variable or argument name
+_TYPE_KEYWORDS = frozenset((
+    "int", "char", "short", "long", "unsigned", "signed", "float", "double",
+    "bool", "void", "wchar_t", "char8_t", "char16_t", "char32_t", "auto",
+    "const", "volatile", "struct", "class", "enum", "union", "typename",
+    "override", "final", "noexcept", "throw", "default", "delete",
+))
+
+# Tokens that matter while skipping a function body
+_BODY_TOKEN_RE = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+    |(?P<preprocessor>^[ \t]*\#(?:\\\n|[^\n])*)
+    |(?P<string>(?:u8|[uUL])?R"(?P<delimiter>[^(\s"]*)\(.*?\)(?P=delimiter)"
+        |"(?:\\.|[^"\\\n])*"
+        |(?<![\w'])'(?:\\.|[^'\\\n])*')
+    |(?P<brace>[{}])
+    """, re.DOTALL | re.MULTILINE | re.VERBOSE)
+
+class _Tokenizer(object):
+    """Produce (kind, value, line_number, position) of tokens, spaces and
+    comments dropped.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.line_number = 1
+        # Position after the last token
+        self.pos = 0
+        self._is_line_start = True
+        self._matches = _TOKEN_RE.finditer(text)
+
+    def next(self):
+        for matched in self._matches:
+            kind = matched.lastgroup
+            if kind == "space":
+                continue
+
+            if kind == "newline":
+                self.line_number += 1
+                self._is_line_start = True
+                continue
+
+            value = matched.group()
+            if kind == "comment":
+                self.line_number += value.count("\n")
+                continue
+
+            if (kind == "preprocessor") and (not self._is_line_start):
+                # Stringizing operator, only possible inside macros
+                kind = "operator"
+                value = "#"
+
+            token = (kind, value, self.line_number, matched.start())
+            if kind in ("preprocessor", "string"):
+                self.line_number += value.count("\n")
+            self.pos = matched.end()
+            self._is_line_start = False
+            return token
+
+        return None
+
+    def skip_block(self, on_preprocessor):
+        """Skip till the brace closing the opened one without tokenizing the
+        codes between, return the closing brace token or None.
+        """
+        depth = 1
+        text = self.text
+        for matched in _BODY_TOKEN_RE.finditer(text, self.pos):
+            kind = matched.lastgroup
+            if kind == "preprocessor":
+                line_number = self.line_number + text.count(
+                    "\n", self.pos, matched.start())
+                on_preprocessor(("preprocessor", matched.group().strip(),
+                                 line_number, matched.start()))
+                continue
+
+            if kind != "brace":
+                continue
+
+            if matched.group() == "{":
+                depth += 1
+                continue
+
+            depth -= 1
+            if depth <= 0:
+                self.line_number += text.count("\n", self.pos, matched.start())
+                self.pos = matched.end()
+                self._is_line_start = False
+                self._matches = _TOKEN_RE.finditer(text, self.pos)
+                return ("operator", "}", self.line_number, matched.start())
+
+        self._matches = iter(())
+        return None
+
+def _find_top_level(tokens, value, start=0):
+    """Index of the first value outside (), [], {} and <>, or None"""
+    depth = 0
+    for i in range(start, len(tokens)):
+        token_value = tokens[i][1]
+        if (depth == 0) and (token_value == value):
+            return i
+        if token_value in ("(", "[", "{", "<"):
+            depth += 1
+        elif token_value in (")", "]", "}", ">"):
+            depth = max(depth - 1, 0)
+    return None
+
+def _find_closing(tokens, index):
+    """Index of the token closing the bracket at index"""
+    opening = tokens[index][1]
+    closing = {"(": ")", "[": "]", "{": "}", "<": ">"}[opening]
+    depth = 0
+    for i in range(index, len(tokens)):
+        token_value = tokens[i][1]
+        if token_value == opening:
+            depth += 1
+        elif token_value == closing:
+            depth -= 1
+            if depth <= 0:
+                return i
+    return len(tokens) - 1
+
+def _find_opening(tokens, index):
+    """Index of the token opening the bracket closed at index"""
+    closing = tokens[index][1]
+    opening = {")": "(", "]": "[", "}": "{", ">": "<"}[closing]
+    depth = 0
+    for i in range(index, -1, -1):
+        token_value = tokens[i][1]
+        if token_value == closing:
+            depth += 1
+        elif token_value == opening:
+            depth -= 1
+            if depth <= 0:
+                return i
+    return 0
+
+def _strip_noises(tokens):
+    """Drop template parameter lists, attributes, string literals (extern
+    "C") and leading macro invocations without semicolon, which never hold
+    names we check.
+    """
+    result = []
+    i = 0
+    while ((i + 1 < len(tokens)) and (tokens[i + 1][1] == "(")
+           and (_MACRO_NAME_RE.match(tokens[i][1]) is not None)):
+        closing_index = _find_closing(tokens, i + 1)
+        if ((closing_index + 1 >= len(tokens))
+            or (tokens[closing_index + 1][1] in (":", "{", "=", ","))):
+            break
+        i = closing_index + 1
+
+    while i < len(tokens):
+        kind, value = tokens[i][:2]
+        next_value = tokens[i + 1][1] if i + 1 < len(tokens) else None
+        if (value == "template") and (next_value == "<"):
+            i = _find_closing(tokens, i + 1) + 1
+        elif (value in _ATTRIBUTES) and (next_value == "("):
+            i = _find_closing(tokens, i + 1) + 1
+        elif (value == "[") and (next_value == "["):
+            i = _find_closing(tokens, i) + 1
+        elif kind == "string":
+            i += 1
+        elif value == "operator":
+            i = _merge_operator_name(tokens, i, result)
+        else:
+            result.append(tokens[i])
+            i += 1
+    return result
+
+def _merge_operator_name(tokens, index, result):
+    """Merge "operator" and the following symbols to one name token, so
+    "operator=", "operator()" and "operator<" could not be mistaken for
+    initializers, calls or template arguments. Return the next index.
+    """
+    values = ["operator"]
+    i = index + 1
+    if ((i + 1 < len(tokens)) and (tokens[i][1] == "(")
+        and (tokens[i + 1][1] == ")")):
+        values.append("()")
+        i += 2
+    while (i < len(tokens)) and (tokens[i][1] not in ("(", ";", "{")):
+        values.append(tokens[i][1])
+        i += 1
+
+    token = tokens[index]
+    result.append(("name", " ".join(values), token[2], token[3]))
+    return i
+
+def _split_top_level(tokens, separator=","):
+    parts = []
+    start = 0
+    while True:
+        index = _find_top_level(tokens, separator, start)
+        if index is None:
+            parts.append(tokens[start:])
+            return parts
+        parts.append(tokens[start:index])
+        start = index + 1
+
+def _get_pointer_declarator_name(tokens, index):
+    """Name of declarators like (*name)(...) or (Class::*name)(...), the
+    open parenthesis at index.
+    """
+    closing_index = _find_closing(tokens, index)
+    inner = tokens[index + 1:closing_index]
+    if (len(inner) <= 0) or (inner[0][1] not in ("*", "&", "^")):
+        if not ((len(inner) >= 3) and (inner[0][0] == "name")
+                and (inner[1][1] == "::") and (inner[2][1] == "*")):
+            return None
+
+    for token in reversed(inner):
+        if token[0] == "name":
+            return token
+    return None
+
+def _get_declarator_name(tokens, needs_type=True):
+    """Name token of a variable or argument declarator, or None if only a
+    type given.
+    """
+    equal_index = _find_top_level(tokens, "=")
+    if equal_index is not None:
+        tokens = tokens[:equal_index]
+
+    paren_index = _find_top_level(tokens, "(")
+    if paren_index is not None:
+        return _get_pointer_declarator_name(tokens, paren_index)
+
+    for stop_value in ("[", ":", "{"):
+        stop_index = _find_top_level(tokens, stop_value)
+        if stop_index is not None:
+            tokens = tokens[:stop_index]
+
+    if len(tokens) <= 0:
+        return None
+
+    name_token = tokens[-1]
+    if (name_token[0] != "name") or (name_token[1] in _TYPE_KEYWORDS):
+        return None
+
+    if (len(tokens) >= 2) and (tokens[-2][1] == "::"):
+        # Qualified name, it's a type or a definition of a static member
+        return None
+
+    if needs_type:
+        type_tokens = [t for t in tokens[:-1] if t[1] not in _SPECIFIERS]
+        if len(type_tokens) <= 0:
+            return None
+
+    return name_token
+
+class _Scope(object):
+    __slots__ = ("kind", "name", "is_typedef", "line_number")
+
+    def __init__(self, kind, name=None, is_typedef=False, line_number=-1):
+        # "namespace", "extern", "class", "struct" or "union"
+        self.kind = kind
+        self.name = name
+        self.is_typedef = is_typedef
+        self.line_number = line_number
+
+class _Extractor(object):
+    def __init__(self, text):
+        self.text = text
+        self.records = []
+        self._tokenizer = _Tokenizer(text)
+        self._scopes = [_Scope("namespace")]
+        # Macros redefined later are only recorded once, like scan_defines()
+        self._defined_names = set()
+
+    def _next(self):
+        while True:
+            token = self._tokenizer.next()
+            if (token is None) or (token[0] != "preprocessor"):
+                return token
+            self._on_preprocessor(token)
+
+    def _emit(self, kind, token, scope=None):
+        pos = token[3]
+        column = -1
+        if pos >= 0:
+            column = pos - self.text.rfind("\n", 0, pos)
+
+        if scope is None:
+            for ascope in reversed(self._scopes):
+                if ascope.name is not None:
+                    scope = ascope.name
+                    break
+
+        self.records.append(Identifier(kind, token[1], token[2], column, scope))
+
+    def run(self):
+        statement = []
+        while True:
+            token = self._next()
+            if token is None:
+                break
+
+            value = token[1]
+            if value == ";":
+                self._on_statement(statement)
+                statement = []
+            elif value == "{":
+                statement = self._on_open_brace(statement, token)
+            elif value == "}":
+                statement = []
+                self._on_close_brace()
+            elif ((value == ":") and (len(statement) > 0)
+                  and (statement[-1][1] in _ACCESS_KEYWORDS)):
+                statement = []
+            else:
+                statement.append(token)
+
+        return self.records
+
+    def _skip_block(self):
+        """Skip a function body, return the closing brace token"""
+        return self._tokenizer.skip_block(self._on_preprocessor)
+
+    def _collect_block(self, statement):
+        """Append an initializer block to statement, the open brace already
+        in it.
+        """
+        depth = 1
+        while depth > 0:
+            token = self._next()
+            if token is None:
+                break
+
+            statement.append(token)
+            if token[1] == "{":
+                depth += 1
+            elif token[1] == "}":
+                depth -= 1
+        return statement
+
+    def _on_preprocessor(self, token):
+        text = token[1]
+        # Offsets kept while joining the continued lines
+        matched = _DEFINE_RE.match(text.replace("\\\n", "  "))
+        if matched is None:
+            return
+
+        def make_token(name, offset):
+            return ("name", name, token[2] + text.count("\n", 0, offset),
+                    token[3] + offset)
+
+        name_token = make_token(matched.group(1), matched.start(1))
+        is_defined = name_token[1] in self._defined_names
+        self._defined_names.add(name_token[1])
+        if matched.group(2) is None:
+            if not is_defined:
+                self._emit("define", name_token)
+            return
+
+        if not is_defined:
+            self._emit("define_function", name_token)
+        for parameter in re.finditer(r"[^,\s]+", matched.group(3)):
+            if "..." not in parameter.group():
+                self._emit("define_function_argument", make_token(
+                    parameter.group(), matched.start(3) + parameter.start()))
+
+    def _on_open_brace(self, statement, brace_token):
+        tokens = _strip_noises(statement)
+        scope = self._scopes[-1]
+        values = [t[1] for t in tokens]
+
+        if (len(statement) == 2) and (statement[0][1] == "extern"):
+            # extern "C" {
+            self._scopes.append(_Scope("extern"))
+            return []
+
+        if (len(values) > 0) and (values[0] == "inline"):
+            tokens = tokens[1:]
+            values = values[1:]
+
+        if (len(values) > 0) and (values[0] == "namespace"):
+            names = [t for t in tokens[1:] if t[0] == "name"]
+            if len(names) > 0:
+                self._emit("namespace", names[-1])
+                self._scopes.append(_Scope("namespace", names[-1][1]))
+            else:
+                self._scopes.append(_Scope("namespace"))
+            return []
+
+        equal_index = _find_top_level(tokens, "=")
+        paren_index = _find_top_level(tokens, "(")
+        key_index = None
+        for i, value in enumerate(values):
+            if value in _CLASS_KEYS or value == "enum":
+                key_index = i
+                break
+            if value not in ("typedef",) + _SPECIFIERS:
+                break
+
+        if equal_index is not None:
+            if (paren_index is None) or (equal_index < paren_index):
+                # Brace initializer, part of the statement
+                return self._collect_block(statement + [brace_token])
+
+        if key_index is not None:
+            colon_index = _find_top_level(tokens, ":")
+            if ((paren_index is None)
+                or ((colon_index is not None) and (colon_index < paren_index))):
+                return self._on_class_head(tokens, key_index)
+
+        if paren_index is None:
+            if scope.kind in _CLASS_KEYS + ("namespace", "extern"):
+                # Unknown block, like a macro expanded to the class head
+                self._scopes.append(_Scope("extern"))
+                return []
+            return self._collect_block(statement + [brace_token])
+
+        closing_index = _find_closing(tokens, paren_index)
+        if ((closing_index + 1 < len(tokens))
+            and (_find_top_level(tokens, ":", closing_index + 1) is not None)
+            and (tokens[-1][0] == "name" or tokens[-1][1] == ">")):
+            # Brace initialized member of a constructor initializer list
+            return self._collect_block(statement + [brace_token])
+
+        self._on_function(tokens, paren_index)
+        function_token = self._get_function_name_token(tokens, paren_index)
+
+        closing_token = self._skip_block()
+        if (function_token is not None) and (closing_token is not None):
+            for matched in LOCAL_VARIANT_RE.finditer(
+                    self.text, brace_token[3] + 1, closing_token[3]):
+                # Reported at the line of the function like CppHeaderParser
+                # front-end does, so no column
+                self._emit("variant", ("name", matched.group(1),
+                                       function_token[2], -1))
+        return []
+
+    def _on_class_head(self, tokens, key_index):
+        key = tokens[key_index][1]
+        is_typedef = (len(tokens) > 0) and (tokens[0][1] == "typedef")
+
+        head = tokens[key_index + 1:]
+        colon_index = _find_top_level(head, ":")
+        if colon_index is not None:
+            head = head[:colon_index]
+        if (len(head) > 0) and (head[-1][1] == ">"):
+            # Specialization like foo<int>
+            head = head[:_find_opening(head, len(head) - 1)]
+        names = [t for t in head
+                 if (t[0] == "name") and (t[1] not in ("final", "class", "struct"))]
+        name_token = names[-1] if len(names) > 0 else None
+
+        if key == "enum":
+            self._on_enum(name_token)
+            return []
+
+        scope = self._scopes[-1]
+        name = None
+        line_number = -1
+        if name_token is not None:
+            name = name_token[1]
+            line_number = name_token[2]
+            if (not is_typedef) and (scope.kind != "union"):
+                self._emit(key, name_token)
+
+        self._scopes.append(_Scope(key, name, is_typedef, line_number))
+        return []
+
+    def _on_close_brace(self):
+        if len(self._scopes) <= 1:
+            return
+
+        scope = self._scopes.pop()
+        if scope.kind not in _CLASS_KEYS:
+            return
+
+        # Declarators after the class body
+        declarators = []
+        while True:
+            token = self._next()
+            if (token is None) or (token[1] == ";"):
+                break
+            declarators.append(token)
+
+        if scope.is_typedef:
+            # typedef struct { ... } name_t, the class named by the typedef
+            names = [t for t in declarators if t[0] == "name"]
+            if len(names) > 0:
+                self._emit(scope.kind, names[0])
+            elif scope.name is not None:
+                self._emit(scope.kind, ("name", scope.name, scope.line_number, -1))
+        elif len(declarators) > 0:
+            # struct { ... } value, variables of the enclosing scope
+            type_token = ("name", scope.kind, declarators[0][2], -1)
+            self._on_variables([type_token] + _strip_noises(declarators))
+
+    def _on_enum(self, name_token):
+        if name_token is not None:
+            self._emit("enum", name_token)
+
+        is_expecting_name = True
+        depth = 0
+        while True:
+            token = self._next()
+            if token is None:
+                return
+
+            value = token[1]
+            if value in ("(", "[", "{"):
+                depth += 1
+            elif value in (")", "]"):
+                depth -= 1
+            elif value == "}":
+                if depth <= 0:
+                    break
+                depth -= 1
+            elif (value == ",") and (depth <= 0):
+                is_expecting_name = True
+            elif is_expecting_name and (token[0] == "name"):
+                self._emit("enum_value", token)
+                is_expecting_name = False
+
+        # Declarators after the enum body, not checked
+        while True:
+            token = self._next()
+            if (token is None) or (token[1] == ";"):
+                break
+
+    def _get_function_name_token(self, tokens, paren_index):
+        if paren_index <= 0:
+            return None
+
+        name_tokens = tokens[:paren_index]
+        if name_tokens[-1][1] == ">":
+            name_tokens = name_tokens[:_find_opening(name_tokens, len(name_tokens) - 1)]
+
+        if (len(name_tokens) <= 0) or (name_tokens[-1][0] != "name"):
+            return None
+        return name_tokens[-1]
+
+    def _on_function(self, tokens, paren_index):
+        scope = self._scopes[-1]
+        if scope.kind == "union":
+            return
+
+        name_tokens = tokens[:paren_index]
+        name_token = self._get_function_name_token(tokens, paren_index)
+        if name_token is None:
+            return
+
+        is_operator = name_token[1].startswith("operator ")
+        name_index = name_tokens.index(name_token)
+
+        qualifier = None
+        is_destructor = False
+        prefix = name_tokens[:name_index]
+        if (len(prefix) > 0) and (prefix[-1][1] == "~"):
+            is_destructor = True
+            prefix = prefix[:-1]
+        while (len(prefix) >= 2) and (prefix[-1][1] == "::"):
+            if qualifier is None:
+                qualifier_tokens = prefix[:-1]
+                if qualifier_tokens[-1][1] == ">":
+                    qualifier_tokens = qualifier_tokens[
+                        :_find_opening(qualifier_tokens, len(qualifier_tokens) - 1)]
+                if len(qualifier_tokens) > 0:
+                    qualifier = qualifier_tokens[-1][1]
+            prefix = prefix[:-2]
+            while (len(prefix) > 0) and (prefix[-1][0] == "name") and (
+                    (len(prefix) < 2) or (prefix[-2][1] != "::")):
+                prefix = prefix[:-1]
+                break
+        return_types = [t for t in prefix if t[1] not in _SPECIFIERS]
+
+        if scope.kind in _CLASS_KEYS:
+            if scope.kind == "struct":
+                method_rule = "struct_method"
+                argument_rule = "struct_method_argument"
+            else:
+                method_rule = "class_method"
+                argument_rule = "class_method_argument"
+
+            if ((not is_operator) and (not is_destructor)
+                and (name_token[1] != scope.name)):
+                self._emit(method_rule, name_token)
+
+            closing_index = _find_closing(tokens, paren_index)
+            for argument in _split_top_level(tokens[paren_index + 1:closing_index]):
+                if "::*" in "".join([t[1] for t in argument]):
+                    continue
+                if "..." in [t[1] for t in argument]:
+                    continue
+                argument_token = _get_declarator_name(argument)
+                if argument_token is not None:
+                    self._emit(argument_rule, argument_token)
+            return
+
+        if is_operator or is_destructor:
+            return
+
+        if qualifier is not None:
+            if qualifier != name_token[1]:
+                # Defined out of the class, "widget_t::get_size()"
+                self._emit("class_method", name_token, qualifier)
+            return
+
+        if name_token[1] == "main":
+            return
+
+        if len(return_types) <= 0:
+            # It maybe a macro invoke
+            return
+
+        self._emit("function", name_token)
+
+    def _on_statement(self, statement):
+        tokens = _strip_noises(statement)
+        if len(tokens) <= 0:
+            return
+
+        scope = self._scopes[-1]
+        first_value = tokens[0][1]
+        if first_value in _SKIPPED_STATEMENTS:
+            return
+
+        if first_value == "typedef":
+            paren_index = _find_top_level(tokens, "(")
+            if (scope.kind in _CLASS_KEYS) and (paren_index is not None):
+                name_token = _get_pointer_declarator_name(tokens, paren_index)
+                if name_token is not None:
+                    self._emit("typedef", name_token)
+            return
+
+        if (first_value in _CLASS_KEYS + ("enum",)) and (
+                (len(tokens) <= 2) or (tokens[2][1] == ":")):
+            # Forward declaration
+            return
+
+        equal_index = _find_top_level(tokens, "=")
+        paren_index = _find_top_level(tokens, "(")
+        if ((paren_index is not None)
+            and ((equal_index is None) or (paren_index < equal_index))
+            and (_get_pointer_declarator_name(tokens, paren_index) is None)):
+            self._on_function(tokens, paren_index)
+            return
+
+        self._on_variables(tokens)
+
+    def _on_variables(self, tokens):
+        scope = self._scopes[-1]
+        if scope.kind == "union":
+            return
+
+        declarators = _split_top_level(tokens)
+        type_tokens = declarators[0]
+        name_token = _get_declarator_name(type_tokens)
+        if name_token is None:
+            return
+
+        type_values = [t[1] for t in type_tokens[:type_tokens.index(name_token)]]
+        if "static" in type_values:
+            rule = "static_variant"
+        elif scope.kind == "struct":
+            rule = "struct_variant"
+        elif scope.kind == "class":
+            rule = "class_variant"
+        else:
+            rule = "global_variant"
+
+        self._emit(rule, name_token)
+        for declarator in declarators[1:]:
+            name_token = _get_declarator_name(declarator, needs_type=False)
+            if name_token is not None:
+                self._emit(rule, name_token)
+
+def extract_identifiers(text):
+    """Return Identifier records of source text in the order they appear"""
+    return _Extractor(text).run()
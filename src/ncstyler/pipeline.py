@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+import threading
+from six.moves import queue
+
+# Reader threads of a Prefetcher, reads of slow (network) filesystems are
+# mostly waiting, so several run at once
+MAX_READER_THREADS = 8
+
+class Prefetcher(object):
+    """Read items ahead in background threads, yield (item, value) in the
+    order of items.
+
+    At most max_pending items are read but not released yet. The consumer
+    calls release() when it's done with an item, so values waiting in a
+    process pool or a report are counted too and memory stays bounded.
+
+    Threads and a semaphore rather than asyncio and a bounded queue, the
+    package still runs on Python 2 (through six), and asyncio would read
+    the files in threads of an executor anyway, there are no asynchronous
+    file reads.
+    """
+
+    def __init__(self, items, read, max_pending, thread_count=None):
+        self._items = list(items)
+        self._read = read
+        self._slots = threading.Semaphore(max(1, max_pending))
+        if thread_count is None:
+            thread_count = min(MAX_READER_THREADS, max(1, max_pending))
+        self._thread_count = thread_count
+        self._tasks = queue.Queue()
+        self._values = dict()
+        self._condition = threading.Condition()
+        self._is_stopped = False
+
+    def release(self):
+        self._slots.release()
+
+    def _feed(self):
+        for index, item in enumerate(self._items):
+            self._slots.acquire()
+            if self._is_stopped:
+                break
+            self._tasks.put((index, item))
+
+        for i in range(self._thread_count):
+            self._tasks.put(None)
+
+    def _work(self):
+        while True:
+            task = self._tasks.get()
+            if (task is None) or self._is_stopped:
+                return
+
+            index, item = task
+            try:
+                result = (self._read(item), None)
+            except Exception as e:
+                # Raised to the consumer, or it waits for the item forever
+                result = (None, e)
+            with self._condition:
+                self._values[index] = result
+                self._condition.notify_all()
+
+    def __iter__(self):
+        threads = [threading.Thread(target=self._feed)]
+        threads += [threading.Thread(target=self._work)
+            for i in range(self._thread_count)]
+        for athread in threads:
+            athread.daemon = True
+            athread.start()
+
+        try:
+            for index, item in enumerate(self._items):
+                with self._condition:
+                    while index not in self._values:
+                        self._condition.wait()
+                    value, error = self._values.pop(index)
+                if error is not None:
+                    raise error
+                yield item, value
+        finally:
+            # Consumer stopped early, wake up the feeder to let it quit
+            self._is_stopped = True
+            self._slots.release()
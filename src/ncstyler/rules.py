@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+
+import os
+import os.path
+import re
+import json
+import fnmatch
+import hashlib
+import tempfile
+from six.moves import cPickle as pickle
+import ncstyler
+
+# Which rule a rule inherits from when the configuration does not override
+# its options
+OVERRIDE_TABLE = {
+    "class": "_base_",
+    "function": "_base_",
+    "variant": "_base_",
+    "namespace": "_base_",
+    "define": "_base_",
+    "filename": "_base_", # Special config use to define filename rule
+
+    "argument": "variant",
+    "static_variant": "variant",
+    "global_variant": "variant",
+    "function_argument": "argument",
+    "class_method_argument": "function_argument",
+    "struct_method_argument": "class_method_argument",
+    "define_function_argument": "function_argument",
+    "define_function": "function",
+    "class_method": "function",
+    "struct_method": "class_method",
+    "class_variant": "variant",
+    "struct_variant": "class_variant",
+    "typedef": "class",
+    "struct": "class",
+    "enum": "class",
+    "enum_value": "define",
+    "union": "struct",
+}
+
+BASE_CONFIG = {
+    "re": "[a-zA-Z0-9_]+",
+    "error": "",
+}
+
+def _load_yaml(file_path):
+    # Only imported when the configuration isn't cached, it's slow to import
+    import yaml
+
+    # The C implementation is much faster if libyaml available
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(file_path, "r") as config_file:
+        return yaml.load(config_file, Loader=loader) or {}
+
+class Rule(object):
+    """A resolved naming rule with it's pattern already compiled"""
+
+    __slots__ = ("name", "config", "regex", "fullmatch", "error_message",
+                 "fix")
+
+    def __init__(self, name, config):
+        self.name = name
+        self.config = config
+        self.regex = re.compile(config["re"])
+        # The whole name must match, return a match object or None
+        self.fullmatch = getattr(self.regex, "fullmatch", None)
+        if self.fullmatch is None:
+            self.fullmatch = re.compile("(?:%s)\\Z" % config["re"]).match
+
+        error_message = config["error"]
+        if len(error_message) > 0:
+            error_message = "%s %s" % (
+                ' '.join([rule_name.capitalize() for rule_name in name.split("_")]),
+                error_message)
+        self.error_message = error_message
+        # Transform renaming violating names by --fix, see ncstyler.fixer
+        self.fix = config.get("fix", None)
+
+class RuleTable(object):
+    """All rules of a configuration, resolved once with the inheritance chain
+    flattened, so looking up a rule is only a dict lookup.
+    """
+
+    def __init__(self, config):
+        config = dict(config)
+
+        # Path glob patterns of files to check and to skip, not rules
+        self.include_patterns = list(config.pop("_include_", None) or [])
+        self.exclude_patterns = list(config.pop("_exclude_", None) or [])
+
+        base_config = dict(BASE_CONFIG)
+        base_config.update(config.get("_base_", None) or {})
+        config["_base_"] = base_config
+
+        resolved_configs = dict()
+        for name in set(OVERRIDE_TABLE.keys()) | set(config.keys()):
+            self._resolve_config(name, config, resolved_configs)
+
+        # Identify the resolved configuration, for caching results
+        self.digest = hashlib.sha1(json.dumps(
+            resolved_configs, sort_keys=True).encode("utf-8")).hexdigest()
+
+        self.__rules = dict()
+        for name, rule_config in resolved_configs.items():
+            self.__rules[name] = Rule(name, rule_config)
+
+    @classmethod
+    def from_file(cls, file_path, cache_dir=None):
+        """Load rules from a YAML file.
+
+        If cache_dir given, the parsed configuration is pickled there keyed
+        by the path, mtime and size of the file, so later runs skip importing
+        and running the YAML parser.
+        """
+        if cache_dir is None:
+            return cls(_load_yaml(file_path))
+
+        stat = os.stat(file_path)
+        key = hashlib.sha1(json.dumps([
+            ncstyler.__version__, os.path.abspath(file_path),
+            getattr(stat, "st_mtime_ns", stat.st_mtime), stat.st_size,
+            ]).encode("utf-8")).hexdigest()
+        pickle_path = os.path.join(cache_dir, "config", "%s.pickle" % key)
+        try:
+            with open(pickle_path, "rb") as pickle_file:
+                return cls(pickle.load(pickle_file))
+        except Exception:
+            # Missing or broken, parse the YAML again
+            pass
+
+        config = _load_yaml(file_path)
+        try:
+            pickle_dir = os.path.dirname(pickle_path)
+            if not os.path.isdir(pickle_dir):
+                os.makedirs(pickle_dir)
+
+            fd, temp_path = tempfile.mkstemp(dir=pickle_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as pickle_file:
+                pickle.dump(config, pickle_file, pickle.HIGHEST_PROTOCOL)
+            os.rename(temp_path, pickle_path)
+        except (IOError, OSError):
+            # Cache is only an optimization
+            pass
+
+        return cls(config)
+
+    def _resolve_config(self, name, config, resolved_configs):
+        if name in resolved_configs:
+            return resolved_configs[name]
+
+        my_config = dict()
+
+        if name in OVERRIDE_TABLE:
+            base_name = OVERRIDE_TABLE[name]
+            my_config.update(
+                self._resolve_config(base_name, config, resolved_configs))
+
+        if name in config:
+            my_config.update(config[name] or {})
+
+        resolved_configs[name] = my_config
+        return my_config
+
+    def is_path_included(self, file_path):
+        """Whether file_path passes the _include_ and _exclude_ patterns.
+
+        A pattern matches the whole path or any trailing part of it, so
+        "generated/*" skips every generated directory.
+        """
+        file_path = os.path.normpath(file_path).replace(os.sep, "/")
+
+        def is_matched(patterns):
+            for pattern in patterns:
+                if (fnmatch.fnmatch(file_path, pattern)
+                    or fnmatch.fnmatch(file_path, "*/" + pattern)):
+                    return True
+            return False
+
+        if (len(self.include_patterns) > 0
+            and (not is_matched(self.include_patterns))):
+            return False
+
+        return not is_matched(self.exclude_patterns)
+
+    def __getitem__(self, name):
+        return self.__rules[name]
+
+    def __contains__(self, name):
+        return name in self.__rules
+
+    def names(self):
+        return sorted(self.__rules.keys())
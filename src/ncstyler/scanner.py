@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+
+import os
+import re
+import mmap
+import errno
+import bisect
+import codecs
+import contextlib
+from ncstyler.identifier import Identifier
+
+# Tokens that matter for finding function bodies: comments and string / char
+# literals are matched as a whole so braces inside them are skipped.
+_TOKEN_RE = re.compile(r"""
+    //[^\n]*
+    |/\*.*?(?:\*/|\Z)
+    |"(?:\\.|[^"\\\n])*"
+    |'(?:\\.|[^'\\\n])*'
+    |[{}]
+    """, re.DOTALL | re.VERBOSE)
+
+# Assignments inside function bodies, treat as local variable declarations
+LOCAL_VARIANT_RE = re.compile(r"\w+\W+(\w+)\s*=[^=]")
+
+# Define directives, with comments and literals matched as a whole so
+# directives inside them are skipped. Other texts are skipped in runs up to
+# the next line starting with "#", not char by char.
+_DEFINE_RE = re.compile(r"""
+    ^[ \t]*\#[ \t]*define[ \t]+(?P<name>\w+)
+        (?P<parameters>\((?:\\\n|[^)\n])*\))?(?:\\\n|[^\n])*
+    |(?:[^/"'\n]|\n(?![ \t]*\#))+
+    |//[^\n]*
+    |/\*.*?(?:\*/|\Z)
+    |"(?:\\.|[^"\\\n])*"
+    |(?<![\w'])'(?:\\.|[^'\\\n])*'
+    """, re.DOTALL | re.MULTILINE | re.VERBOSE)
+_PARAMETER_RE = re.compile(r"[^,\s()]+")
+
+# Files smaller than this are read, mapping them costs more than it saves
+MMAP_THRESHOLD = 256 * 1024
+
+# BOM -> decoder, UTF-32 ones first since the UTF-32-LE BOM starts with the
+# UTF-16-LE one. The decoders consume the BOM themselves.
+_BOM_DECODERS = (
+    (codecs.BOM_UTF32_LE, codecs.utf_32_decode),
+    (codecs.BOM_UTF32_BE, codecs.utf_32_decode),
+    (codecs.BOM_UTF16_LE, codecs.utf_16_decode),
+    (codecs.BOM_UTF16_BE, codecs.utf_16_decode),
+)
+
+def scan_defines(text):
+    """Return Identifier records of all define directives in text, in one
+    pass and with their line and column.
+
+    A macro defined more than once (in several #if branches, or again after
+    #undef) is only recorded the first time, parameters of every definition
+    are recorded.
+    """
+    records = []
+    append = records.append
+    count_lines = text.count
+    defined_names = set()
+    line_number = 1
+    last_pos = 0
+    for matched in _DEFINE_RE.finditer(text):
+        name, parameters = matched.group("name", "parameters")
+        if name is None:
+            continue
+
+        # Directives are matched from the line start
+        pos = matched.start()
+        line_number += count_lines("\n", last_pos, pos)
+        last_pos = pos
+
+        if name not in defined_names:
+            defined_names.add(name)
+            kind = "define" if parameters is None else "define_function"
+            append(Identifier(kind, name, line_number,
+                              matched.start("name") - pos + 1))
+
+        if parameters is None:
+            continue
+
+        # Offsets kept while joining the continued lines
+        parameters_pos = matched.start("parameters")
+        for parameter in _PARAMETER_RE.finditer(
+                parameters.replace("\\\n", "  ")):
+            if "..." in parameter.group():
+                continue
+
+            parameter_pos = parameters_pos + parameter.start()
+            append(Identifier(
+                "define_function_argument", parameter.group(),
+                line_number + count_lines("\n", pos, parameter_pos),
+                parameter_pos - text.rfind("\n", 0, parameter_pos)))
+
+    return records
+
+@contextlib.contextmanager
+def open_source(file_path):
+    """Yield content of a file as a bytes like object, big files are memory
+    mapped instead of read into memory.
+    """
+    with open(file_path, "rb") as source_file:
+        size = os.fstat(source_file.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            yield source_file.read()
+            return
+
+        try:
+            mapped = mmap.mmap(
+                source_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except mmap.error as e:
+            if e.errno != errno.ENOMEM:
+                raise
+            # Out of address space (like with --max-memory), reading may
+            # still fit, or raises MemoryError
+            yield source_file.read()
+            return
+
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+def decode_source(content):
+    """Decode bytes (or a memory mapped file) of a source file once without
+    copying it, honor the UTF-8/16/32 BOMs and fall back to latin-1 for
+    legacy encoded files, so decoding never fails.
+    """
+    head = content[:4]
+    if head.startswith(codecs.BOM_UTF8):
+        return codecs.utf_8_decode(
+            memoryview(content)[len(codecs.BOM_UTF8):], "replace", True)[0]
+
+    for bom, decoder in _BOM_DECODERS:
+        if head.startswith(bom):
+            return decoder(content, "replace", True)[0]
+
+    try:
+        return codecs.utf_8_decode(content, "strict", True)[0]
+    except UnicodeDecodeError:
+        return codecs.latin_1_decode(content)[0]
+
+class SourceScanner(object):
+    """Index of a whole source file built by a single pass.
+
+    Records the offset of every line and the matching close brace of every
+    open brace outside comments and string literals, so function bodies could
+    be located without copying or rescanning the rest of the file.
+    """
+
+    def __init__(self, text):
+        self.text = text
+
+        self.line_offsets = [0]
+        pos = text.find("\n")
+        while pos >= 0:
+            self.line_offsets.append(pos + 1)
+            pos = text.find("\n", pos + 1)
+
+        # Open brace position -> close brace position
+        self.brace_pairs = dict()
+        # Sorted positions of all open braces (include unmatched ones)
+        self._open_positions = []
+        stack = []
+        for matched in _TOKEN_RE.finditer(text):
+            token = matched.group()
+            if token == "{":
+                stack.append(matched.start())
+                self._open_positions.append(matched.start())
+            elif token == "}":
+                if len(stack) > 0:
+                    self.brace_pairs[stack.pop()] = matched.start()
+
+    def get_line_offset(self, line_number):
+        index = min(max(line_number - 1, 0), len(self.line_offsets) - 1)
+        return self.line_offsets[index]
+
+    def get_line_number(self, pos):
+        return bisect.bisect_right(self.line_offsets, pos)
+
+    def find_function_body(self, line_number, name_re):
+        """Find body of function named by name_re declared at line_number.
+
+        Return (start, stop) offsets of the codes between the braces, or None
+        if it's only a declaration or the body could not be found.
+        """
+        matched = re.compile(name_re).search(
+            self.text, self.get_line_offset(line_number))
+        if matched is None:
+            return None
+
+        parameters_start_pos = self.text.find('(', matched.start())
+        if parameters_start_pos < 0:
+            return None
+
+        parameters_stop_pos = self.text.find(')', parameters_start_pos)
+        if parameters_stop_pos < 0:
+            return None
+
+        # A semicolon before the body means it's only a declaration
+        semicolon_pos = self.text.find(';', parameters_stop_pos + 1)
+        if semicolon_pos < 0:
+            semicolon_pos = len(self.text)
+
+        index = bisect.bisect_right(self._open_positions, parameters_stop_pos)
+        if index >= len(self._open_positions):
+            return None
+
+        open_pos = self._open_positions[index]
+        if open_pos >= semicolon_pos:
+            return None
+
+        if open_pos not in self.brace_pairs:
+            # Unbalanced braces till the end of file
+            return None
+
+        return open_pos + 1, self.brace_pairs[open_pos]
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+
+import os
+import os.path
+import json
+import socket
+from six.moves import socketserver
+from ncstyler.diagnostics import Diagnostic
+
+# Protocol: every request and response is one JSON object per line.
+#
+# Requests:
+#   {"path": "/abs/path.h"}                      Check a file on disk
+#   {"path": "name.h", "content": "..."}         Check an unsaved buffer
+#   {"command": "ping"} / {"command": "shutdown"}
+#
+# Responses:
+#   {"exit_code": 1, "diagnostics": [{...}, ...]}
+#   {"error": "message"}
+
+class ServerError(Exception):
+    pass
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for aline in self.rfile:
+            aline = aline.strip()
+            if len(aline) <= 0:
+                continue
+
+            try:
+                response = self._dispatch(json.loads(aline.decode("utf-8")))
+            except Exception as e:
+                response = {"error": "%s: %s" % (type(e).__name__, e)}
+
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+            if response.get("shutdown", False):
+                self.server.is_shutdown_requested = True
+                break
+
+    def _dispatch(self, request):
+        command = request.get("command", "check")
+        if command == "ping":
+            return {"pong": True}
+        elif command == "shutdown":
+            return {"shutdown": True}
+        elif command != "check":
+            raise ServerError("Unknown command '%s'" % command)
+
+        application = self.server.application
+        file_path = request["path"]
+        try:
+            if not application.is_path_included(file_path):
+                exit_code, diagnostics = 0, []
+            elif request.get("content", None) is None:
+                exit_code, diagnostics = application.check_file(file_path)
+            else:
+                exit_code, diagnostics = application.check_source(
+                    file_path, request["content"])
+        except Exception as e:
+            # Fail this file only, not the batch of the client
+            exit_code, diagnostics = 1, [Diagnostic.from_exception(file_path, e)]
+
+        return {
+            "exit_code": exit_code,
+            "diagnostics": [d.to_dict() for d in diagnostics],
+        }
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    # Wake up periodically to see if shutdown requested
+    timeout = 0.5
+
+    def __init__(self, socket_path, application):
+        self.application = application
+        self.is_shutdown_requested = False
+        socketserver.UnixStreamServer.__init__(
+            self, socket_path, _RequestHandler)
+
+def serve(application, socket_path):
+    """Serve check requests on a unix socket until shutdown requested.
+
+    The application keeps it's rule table, cache and the imported parser
+    warm between requests. Each connection is served by a thread.
+    """
+    if os.path.exists(socket_path):
+        # Leave a socket of a running server alone, only remove stale one
+        if Client(socket_path).is_alive():
+            raise ServerError("Server already running at '%s'" % socket_path)
+        os.remove(socket_path)
+
+    server = _Server(socket_path, application)
+    try:
+        while not server.is_shutdown_requested:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+class Client(object):
+    """Thin client forwards check requests to a running server"""
+
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self._socket = None
+        self._file = None
+
+    def _connect(self):
+        if self._socket is None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                self._socket.connect(self.socket_path)
+            except socket.error:
+                self._socket.close()
+                self._socket = None
+                raise
+
+            self._file = self._socket.makefile("rwb")
+
+    def close(self):
+        if self._socket is not None:
+            self._file.close()
+            self._socket.close()
+            self._socket = None
+            self._file = None
+
+    def request(self, request):
+        self._connect()
+        self._file.write(json.dumps(request).encode("utf-8") + b"\n")
+        self._file.flush()
+
+        aline = self._file.readline()
+        if len(aline) <= 0:
+            self.close()
+            raise ServerError("Server closed the connection")
+
+        response = json.loads(aline.decode("utf-8"))
+        if "error" in response:
+            raise ServerError(response["error"])
+
+        return response
+
+    def is_alive(self):
+        try:
+            self.request({"command": "ping"})
+            return True
+        except (socket.error, ServerError):
+            return False
+        finally:
+            self.close()
+
+    def shutdown(self):
+        try:
+            self.request({"command": "shutdown"})
+        finally:
+            self.close()
+
+    def check_file(self, file_path, content=None):
+        """Same as Application.check_file() but checked by the server"""
+        request = {"path": os.path.abspath(file_path)}
+        if content is not None:
+            request["content"] = content
+
+        response = self.request(request)
+        diagnostics = [Diagnostic.from_dict(v) for v in response["diagnostics"]]
+        for adiagnostic in diagnostics:
+            adiagnostic.file_path = file_path
+
+        return response["exit_code"], diagnostics
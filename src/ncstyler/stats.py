@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+import os.path
+from timeit import default_timer
+
+# Phases of checking a file:
+#   read     : Reading the file (or finding it's cached result)
+#   parse    : CppHeaderParser parsing, or the whole extraction by the lite
+#              front-end (include function bodies)
+#   index    : Building the function body index
+#   traverse : _validate_cpp_object() walk collecting the names, exclude the
+#              function bodies
+#   body     : Collecting local variables inside function bodies
+#   validate : Matching the collected names against their rules
+PHASES = ("read", "parse", "index", "traverse", "body", "validate")
+
+class FileStats(object):
+    """Wall time of each phase and identifiers checked by each rule of a
+    file.
+    """
+
+    __slots__ = ("file_path", "phase_seconds", "rule_counts", "rule_seconds",
+                 "is_cached")
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.phase_seconds = dict((phase, 0.0) for phase in PHASES)
+        self.rule_counts = dict()
+        self.rule_seconds = dict()
+        self.is_cached = False
+
+    def add_phase(self, phase, seconds):
+        self.phase_seconds[phase] += seconds
+
+    def add_rule(self, rule, seconds, count=1):
+        self.rule_counts[rule] = self.rule_counts.get(rule, 0) + count
+        self.rule_seconds[rule] = self.rule_seconds.get(rule, 0.0) + seconds
+
+    @property
+    def total_seconds(self):
+        return sum(self.phase_seconds.values())
+
+class RunStats(object):
+    """Statistics of all files checked in a run"""
+
+    def __init__(self):
+        self.files = []
+        self.start_time = default_timer()
+
+    def add(self, file_stats):
+        self.files.append(file_stats)
+
+    def to_dict(self, top=10):
+        phase_seconds = dict((phase, 0.0) for phase in PHASES)
+        rule_counts = dict()
+        rule_seconds = dict()
+        for file_stats in self.files:
+            for phase, seconds in file_stats.phase_seconds.items():
+                phase_seconds[phase] += seconds
+            for rule, count in file_stats.rule_counts.items():
+                rule_counts[rule] = rule_counts.get(rule, 0) + count
+            for rule, seconds in file_stats.rule_seconds.items():
+                rule_seconds[rule] = rule_seconds.get(rule, 0.0) + seconds
+
+        files = sorted(self.files, key=lambda s: s.total_seconds, reverse=True)
+        rules = sorted(rule_seconds.keys(), key=lambda r: rule_seconds[r],
+                       reverse=True)
+
+        return {
+            "wall_seconds": default_timer() - self.start_time,
+            "file_count": len(self.files),
+            "cached_file_count": len([s for s in self.files if s.is_cached]),
+            "phase_seconds": phase_seconds,
+            "rule_counts": rule_counts,
+            "rule_seconds": rule_seconds,
+            "slowest_files": [{
+                "file_path": s.file_path,
+                "total_seconds": s.total_seconds,
+                "phase_seconds": s.phase_seconds,
+                } for s in files[:top]],
+            "slowest_rules": [{
+                "rule": rule,
+                "count": rule_counts[rule],
+                "seconds": rule_seconds[rule],
+                } for rule in rules[:top]],
+        }
+
+    def format_text(self, top=10):
+        values = self.to_dict(top)
+        lines = []
+        lines.append("%d files (%d cached) checked in %.3fs" % (
+            values["file_count"], values["cached_file_count"],
+            values["wall_seconds"]))
+
+        lines.append("Time per phase:")
+        for phase in PHASES:
+            lines.append("  %-10s %10.3fs" % (
+                phase, values["phase_seconds"][phase]))
+
+        lines.append("Identifiers checked per rule:")
+        rule_counts = values["rule_counts"]
+        for rule in sorted(rule_counts.keys()):
+            lines.append("  %-26s %10d" % (rule, rule_counts[rule]))
+
+        lines.append("Slowest files:")
+        for afile in values["slowest_files"]:
+            phase_seconds = afile["phase_seconds"]
+            lines.append("  %8.3fs %s (%s)" % (
+                afile["total_seconds"],
+                os.path.normpath(afile["file_path"]),
+                ", ".join(["%s %.3fs" % (phase, phase_seconds[phase])
+                           for phase in PHASES])))
+
+        lines.append("Slowest rules:")
+        for arule in values["slowest_rules"]:
+            lines.append("  %8.3fs %-26s %10d identifiers" % (
+                arule["seconds"], arule["rule"], arule["count"]))
+
+        return "\n".join(lines)
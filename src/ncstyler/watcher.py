@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+
+import os
+import os.path
+import sys
+import time
+import errno
+import select
+import struct
+
+# Seconds without further changes before the changed files are checked,
+# editors often write a file several times while saving
+DEFAULT_DEBOUNCE = 0.2
+DEFAULT_POLL_INTERVAL = 1.0
+
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+def _decode_name(name):
+    if not isinstance(name, str):
+        name = name.decode(sys.getfilesystemencoding() or "utf-8", "replace")
+    return name
+
+class _InotifyWatcher(object):
+    """Watch directory trees by inotify through libc, so nothing but the
+    changed files are looked at.
+    """
+
+    def __init__(self, roots, list_files):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6",
+                                 use_errno=True)
+        self._list_files = list_files
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1() failed")
+
+        self._directories = dict()
+        try:
+            for aroot in roots:
+                if os.path.isdir(aroot):
+                    self._add_tree(aroot)
+                else:
+                    # Editors replace files, watch the directory instead
+                    self._add_directory(os.path.dirname(aroot) or ".")
+        except OSError:
+            self.close()
+            raise
+
+    def _add_directory(self, directory):
+        import ctypes
+
+        path = directory
+        if not isinstance(path, bytes):
+            path = path.encode(sys.getfilesystemencoding() or "utf-8")
+        wd = self._libc.inotify_add_watch(self._fd, path, _WATCH_MASK)
+        if wd < 0:
+            an_errno = ctypes.get_errno()
+            raise OSError(an_errno, "Failed to watch '%s' : %s" % (
+                directory, os.strerror(an_errno)))
+        self._directories[wd] = directory
+
+    def _add_tree(self, directory):
+        """Watch the directory and the directories in it, return the files
+        already in them.
+        """
+        file_paths = []
+        for root, dir_names, file_names in os.walk(directory):
+            self._add_directory(root)
+            file_paths.extend(
+                [os.path.join(root, file_name) for file_name in file_names])
+        return file_paths
+
+    def read_changes(self, timeout):
+        """Wait up to timeout seconds, return paths of the changed files"""
+        readable = select.select([self._fd], [], [], timeout)[0]
+        if len(readable) <= 0:
+            return []
+
+        data = b""
+        while True:
+            try:
+                chunk = os.read(self._fd, 65536)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            if len(chunk) <= 0:
+                break
+            data += chunk
+
+        changes = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, name_size = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = _decode_name(data[offset:offset + name_size].rstrip(b"\0"))
+            offset += name_size
+
+            if mask & _IN_Q_OVERFLOW:
+                # Events lost, everything may changed
+                return list(self._list_files())
+
+            if mask & _IN_IGNORED:
+                self._directories.pop(wd, None)
+                continue
+
+            directory = self._directories.get(wd, None)
+            if directory is None:
+                continue
+
+            path = os.path.join(directory, name)
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    try:
+                        changes.extend(self._add_tree(path))
+                    except OSError:
+                        # Removed again before we looked into it
+                        pass
+                continue
+
+            if mask & _IN_CREATE:
+                # Wait for IN_CLOSE_WRITE, the file may still be empty
+                continue
+
+            changes.append(path)
+
+        return changes
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+class _PollingWatcher(object):
+    """Compare modification time and size of the files every interval, for
+    platforms without inotify.
+    """
+
+    def __init__(self, list_files, interval=DEFAULT_POLL_INTERVAL):
+        self._list_files = list_files
+        self._interval = interval
+        self._last_time = time.time()
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self):
+        snapshot = dict()
+        for file_path in self._list_files():
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            snapshot[file_path] = (
+                getattr(stat, "st_mtime_ns", stat.st_mtime), stat.st_size)
+        return snapshot
+
+    def read_changes(self, timeout):
+        time.sleep(timeout)
+        if time.time() - self._last_time < self._interval:
+            return []
+
+        self._last_time = time.time()
+        snapshot = self._take_snapshot()
+        changes = [file_path for file_path, state in snapshot.items()
+            if self._snapshot.get(file_path, None) != state]
+        self._snapshot = snapshot
+        return changes
+
+    def close(self):
+        pass
+
+def create_watcher(roots, list_files, poll_interval=DEFAULT_POLL_INTERVAL):
+    """Return an inotify watcher of roots, or a polling one of the files
+    list_files() returns where inotify is unavailable.
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            return _InotifyWatcher(roots, list_files)
+        except (OSError, AttributeError):
+            # No inotify in libc, or out of watches
+            pass
+
+    return _PollingWatcher(list_files, poll_interval)
+
+def watch(roots, list_files, on_changes, debounce=DEFAULT_DEBOUNCE,
+          poll_interval=DEFAULT_POLL_INTERVAL):
+    """Call on_changes() with the sorted paths of changed files, after no
+    more changes for debounce seconds. Runs until interrupted.
+    """
+    watcher = create_watcher(roots, list_files, poll_interval)
+    try:
+        pending = set()
+        while True:
+            timeout = debounce if len(pending) > 0 else poll_interval
+            changes = watcher.read_changes(timeout)
+            if len(changes) > 0:
+                pending.update(changes)
+                continue
+
+            if len(pending) > 0:
+                on_changes(sorted(pending))
+                pending = set()
+    finally:
+        watcher.close()